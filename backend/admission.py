@@ -0,0 +1,165 @@
+"""Admission control and load shedding for LLM-backed endpoints.
+
+Expensive routes pass through an `AdmissionController` (a bounded concurrency
+limit with a queue-wait estimate) and a per-user `TokenBucket`. Requests that
+would wait past their deadline are rejected up front with 503, and users over
+their rate get 429, both with a Retry-After hint. Cheap routes never touch it.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_DEADLINE_SECONDS = float(os.environ.get("LLM_QUEUE_DEADLINE_SECONDS", "20"))
+USER_RATE_PER_MINUTE = float(os.environ.get("USER_GENERATION_RATE_PER_MINUTE", "10"))
+USER_BURST = float(os.environ.get("USER_GENERATION_BURST", "5"))
+MAX_TRACKED_USERS = 10000
+
+ADMISSION_DECISIONS = Counter("admission_decisions_total", "Admission decisions by pool and outcome", ("pool", "outcome"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: float, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = detail
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def try_take(self) -> float:
+        """Take a token; returns 0 on success, otherwise seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def give_back(self):
+        """Return a token taken for a request that was not served"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class UserRateLimiter:
+    """Per-user token buckets, keeping the most recently active users"""
+
+    def __init__(self, rate_per_minute: float = USER_RATE_PER_MINUTE, burst: float = USER_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, user_key: str):
+        bucket = self._buckets.get(user_key)
+        if bucket is None:
+            bucket = self._buckets[user_key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > MAX_TRACKED_USERS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_key)
+
+        wait = bucket.try_take()
+        if wait:
+            raise AdmissionRejected(429, wait, "Rate limit exceeded, please retry later")
+
+    def refund(self, user_key: str):
+        """Give back the token of a checked request the server then refused"""
+        bucket = self._buckets.get(user_key)
+        if bucket is not None:
+            bucket.give_back()
+
+
+class AdmissionController:
+    """Bounded concurrency with queue-time-aware rejection.
+
+    The expected wait for a new request is estimated from the number of
+    requests ahead of it and an exponentially weighted average service time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        deadline_seconds: float = LLM_QUEUE_DEADLINE_SECONDS,
+        initial_service_time: float = 5.0
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.deadline_seconds = deadline_seconds
+        self.avg_service_time = initial_service_time
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_arrival_at = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._arrival = asyncio.Event()
+
+    def expected_wait(self) -> float:
+        ahead = self.in_flight + self.waiting - self.max_concurrency + 1
+        if ahead <= 0:
+            return 0.0
+        return math.ceil(ahead / self.max_concurrency) * self.avg_service_time
+
+    def idle_for(self) -> float:
+        """Seconds the pool has had no requests in flight or queued (0 while busy)"""
+        if self.in_flight or self.waiting:
+            return 0.0
+        return time.monotonic() - self.last_arrival_at
+
+    async def wait_for_arrival(self):
+        """Wait until the next request arrives at this pool"""
+        await self._arrival.wait()
+
+    def _record_service_time(self, seconds: float):
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * seconds
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block, or raise AdmissionRejected"""
+        self.last_arrival_at = time.monotonic()
+        # Wake background work waiting to yield, then arm a fresh event
+        self._arrival.set()
+        self._arrival = asyncio.Event()
+
+        expected = self.expected_wait()
+        if expected > self.deadline_seconds:
+            ADMISSION_DECISIONS.inc(self.name, "shed")
+            raise AdmissionRejected(503, expected, "Server is busy, please retry later")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.deadline_seconds)
+        except asyncio.TimeoutError:
+            ADMISSION_DECISIONS.inc(self.name, "timeout")
+            raise AdmissionRejected(503, self.avg_service_time, "Server is busy, please retry later")
+        finally:
+            self.waiting -= 1
+
+        ADMISSION_DECISIONS.inc(self.name, "admitted")
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._record_service_time(time.monotonic() - start)
+
+
+generation_admission = AdmissionController("generation")
+generation_rate_limiter = UserRateLimiter()
@@ -1,7 +1,14 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from typing import Any, AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from datetime import datetime
 import os
+import asyncio
 import logging
+from metrics import timed_db_operation
+from models import TREND_SUMMARY_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +19,36 @@ class Database:
 # Database instance
 database = Database()
 
+# Connection pool and timeout settings
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "5")),
+    "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "20000")),
+}
+
+# Trends not refreshed within this window are removed by a TTL index on updated_at
+TREND_TTL_SECONDS = int(os.environ.get("TREND_TTL_SECONDS", str(7 * 24 * 3600)))
+BULK_WRITE_BATCH_SIZE = int(os.environ.get("BULK_WRITE_BATCH_SIZE", "1000"))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+# Refinement sessions idle for this long are removed by a TTL index on updated_at
+CHAT_SESSION_TTL_SECONDS = int(os.environ.get("CHAT_SESSION_TTL_SECONDS", str(24 * 3600)))
+
+def fields_projection(paths: List[str]) -> Dict[str, Any]:
+    """Mongo projection returning only the given (dotted) fields"""
+    projection = {"_id": 0}
+    for path in paths:
+        # Mongo rejects a path together with one of its parents; the parent wins
+        if any(path.startswith(f"{other}.") for other in paths):
+            continue
+        projection[path] = 1
+    return projection
+
+# Fields returned by trend list views (the card-sized trend summary)
+TREND_LIST_PROJECTION = fields_projection(TREND_SUMMARY_FIELDS)
+
 async def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
     return database.database
@@ -25,18 +62,18 @@ async def connect_db():
         if not mongo_url:
             raise ValueError("MONGO_URL not found in environment variables")
         
-        database.client = AsyncIOMotorClient(mongo_url)
+        database.client = AsyncIOMotorClient(mongo_url, **MONGO_CLIENT_OPTIONS)
         database.database = database.client[db_name.strip('"')]
         
         # Test connection
         await database.client.admin.command('ping')
-        logger.info(f"Connected to MongoDB database: {db_name}")
+        logger.info("Connected to MongoDB database: %s", db_name)
         
         # Create indexes for better performance
         await create_indexes()
         
     except Exception as e:
-        logger.error(f"Error connecting to database: {str(e)}")
+        logger.error("Error connecting to database: %s", e)
         raise
 
 async def close_db():
@@ -45,33 +82,76 @@ async def close_db():
         database.client.close()
         logger.info("Disconnected from MongoDB")
 
+# Index specifications per collection: (keys, options). Compound indexes follow
+# the equality-then-sort shape of the queries below.
+INDEX_SPECS = {
+    "trends": [
+        ([("id", ASCENDING)], {"unique": True}),
+        ([("contentScore", DESCENDING)], {}),
+        ([("category", ASCENDING), ("contentScore", DESCENDING)], {}),
+        ([("platform", ASCENDING), ("contentScore", DESCENDING)], {}),
+        ([("category", ASCENDING), ("platform", ASCENDING), ("contentScore", DESCENDING)], {}),
+        ([("topic", ASCENDING)], {}),
+        ([("created_at", ASCENDING)], {}),
+        ([("updated_at", ASCENDING)], {"expireAfterSeconds": TREND_TTL_SECONDS}),
+    ],
+    "generated_content": [
+        ([("id", ASCENDING)], {"unique": True}),
+        ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+        ([("trend_id", ASCENDING)], {}),
+        ([("session_id", ASCENDING)], {}),
+        ([("created_at", ASCENDING)], {}),
+    ],
+    "users": [
+        ([("id", ASCENDING)], {"unique": True}),
+        ([("email", ASCENDING)], {"unique": True}),
+    ],
+    "shared_cache": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "chat_sessions": [
+        ([("id", ASCENDING)], {"unique": True}),
+        ([("updated_at", ASCENDING)], {"expireAfterSeconds": CHAT_SESSION_TTL_SECONDS}),
+    ],
+}
+
+async def _ensure_collection_indexes(collection_name: str, specs) -> int:
+    """Create the missing indexes of one collection in a single round-trip"""
+    collection = database.database[collection_name]
+    existing = await collection.index_information()
+    existing_by_keys = {tuple(tuple(key) for key in info["key"]): info for info in existing.values()}
+    
+    missing = []
+    for keys, options in specs:
+        info = existing_by_keys.get(tuple(keys))
+        if info is None:
+            missing.append(IndexModel(keys, **options))
+        elif "expireAfterSeconds" in options and info.get("expireAfterSeconds") != options["expireAfterSeconds"]:
+            # TTL changed in configuration; update it in place
+            await database.database.command(
+                "collMod", collection_name,
+                index={"keyPattern": dict(keys), "expireAfterSeconds": options["expireAfterSeconds"]}
+            )
+    
+    if missing:
+        await collection.create_indexes(missing)
+    return len(missing)
+
 async def create_indexes():
-    """Create database indexes for better performance"""
+    """Create database indexes for better performance, skipping those that already exist"""
     try:
-        db = database.database
-        
-        # Trends collection indexes
-        await db.trends.create_index("topic")
-        await db.trends.create_index("platform")
-        await db.trends.create_index("category")
-        await db.trends.create_index("contentScore")
-        await db.trends.create_index("created_at")
-        
-        # Generated content collection indexes
-        await db.generated_content.create_index("user_id")
-        await db.generated_content.create_index("trend_id")
-        await db.generated_content.create_index("session_id")
-        await db.generated_content.create_index("created_at")
+        created = await asyncio.gather(*(
+            _ensure_collection_indexes(collection_name, specs)
+            for collection_name, specs in INDEX_SPECS.items()
+        ))
         
-        # Users collection indexes
-        await db.users.create_index("email", unique=True)
-        
-        logger.info("Database indexes created successfully")
+        logger.info("Database indexes ready (%s created)", sum(created))
         
     except Exception as e:
-        logger.error(f"Error creating indexes: {str(e)}")
+        logger.error("Error creating indexes: %s", e)
 
 # CRUD Operations for Trends
+@timed_db_operation("save_trend")
 async def save_trend(trend_data: dict) -> str:
     """Save trend to database"""
     try:
@@ -79,46 +159,97 @@ async def save_trend(trend_data: dict) -> str:
         result = await db.trends.insert_one(trend_data)
         return str(result.inserted_id)
     except Exception as e:
-        logger.error(f"Error saving trend: {str(e)}")
+        logger.error("Error saving trend: %s", e)
+        raise
+
+@timed_db_operation("upsert_trends")
+async def upsert_trends(trends: List[dict]) -> Dict[str, int]:
+    """Bulk upsert trends keyed on their stable ID with unordered bulk writes"""
+    try:
+        db = await get_database()
+        now = datetime.utcnow()
+        totals = {"upserted": 0, "modified": 0, "matched": 0}
+        
+        for start in range(0, len(trends), BULK_WRITE_BATCH_SIZE):
+            operations = []
+            for trend in trends[start:start + BULK_WRITE_BATCH_SIZE]:
+                fields = {key: value for key, value in trend.items() if key not in ("_id", "created_at")}
+                fields["updated_at"] = now
+                operations.append(UpdateOne(
+                    {"id": trend["id"]},
+                    {"$set": fields, "$setOnInsert": {"created_at": trend.get("created_at", now)}},
+                    upsert=True
+                ))
+            
+            result = await db.trends.bulk_write(operations, ordered=False)
+            totals["upserted"] += result.upserted_count
+            totals["modified"] += result.modified_count
+            totals["matched"] += result.matched_count
+        
+        return totals
+    except Exception as e:
+        logger.error("Error upserting trends: %s", e)
         raise
 
+def build_trend_query(category: str = None, platform: str = None) -> Dict[str, Any]:
+    """Build the trend filter; matches the (category, platform, contentScore) index shapes"""
+    query = {}
+    if category:
+        query["category"] = category
+    if platform:
+        query["platform"] = platform
+    return query
+
+def trends_cursor(
+    db: AsyncIOMotorDatabase,
+    category: str = None,
+    platform: str = None,
+    limit: int = 20,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = TREND_LIST_PROJECTION
+):
+    """Cursor for the trend list query, sorted by contentScore"""
+    return (
+        db.trends.find(build_trend_query(category, platform), projection)
+        .sort("contentScore", DESCENDING)
+        .skip(skip)
+        .limit(limit)
+    )
+
+@timed_db_operation("get_trends")
 async def get_trends(
     category: str = None, 
     platform: str = None, 
     limit: int = 20,
-    skip: int = 0
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = TREND_LIST_PROJECTION
 ):
-    """Get trends from database with filters"""
+    """Get trends from database with filters (list view fields by default; projection=None for full documents)"""
     try:
         db = await get_database()
         
-        # Build query
-        query = {}
-        if category:
-            query["category"] = category
-        if platform:
-            query["platform"] = platform
-        
         # Execute query
-        cursor = db.trends.find(query).sort("contentScore", -1).skip(skip).limit(limit)
+        cursor = trends_cursor(db, category, platform, limit, skip, projection)
         trends = await cursor.to_list(length=limit)
         
         return trends
     except Exception as e:
-        logger.error(f"Error getting trends: {str(e)}")
+        logger.error("Error getting trends: %s", e)
         return []
 
+@timed_db_operation("get_trend_by_id")
 async def get_trend_by_id(trend_id: str):
     """Get trend by ID"""
     try:
         db = await get_database()
-        trend = await db.trends.find_one({"id": trend_id})
+        trend = await db.trends.find_one({"id": trend_id}, {"_id": 0})
         return trend
     except Exception as e:
-        logger.error(f"Error getting trend by ID: {str(e)}")
+        logger.error("Error getting trend by ID: %s", e)
         return None
 
 # CRUD Operations for Generated Content
+@timed_db_operation("save_generated_content")
 async def save_generated_content(content_data: dict) -> str:
     """Save generated content to database"""
     try:
@@ -126,31 +257,88 @@ async def save_generated_content(content_data: dict) -> str:
         result = await db.generated_content.insert_one(content_data)
         return str(result.inserted_id)
     except Exception as e:
-        logger.error(f"Error saving generated content: {str(e)}")
+        logger.error("Error saving generated content: %s", e)
         raise
 
+@timed_db_operation("get_user_generated_content")
 async def get_user_generated_content(user_id: str, limit: int = 50):
     """Get user's generated content history"""
     try:
         db = await get_database()
-        cursor = db.generated_content.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+        cursor = db.generated_content.find({"user_id": user_id}, {"_id": 0}).sort("created_at", DESCENDING).limit(limit)
         content_list = await cursor.to_list(length=limit)
         return content_list
     except Exception as e:
-        logger.error(f"Error getting user generated content: {str(e)}")
+        logger.error("Error getting user generated content: %s", e)
         return []
 
+@timed_db_operation("get_generated_content_by_id")
 async def get_generated_content_by_id(content_id: str):
     """Get generated content by ID"""
     try:
         db = await get_database()
-        content = await db.generated_content.find_one({"id": content_id})
+        content = await db.generated_content.find_one({"id": content_id}, {"_id": 0})
         return content
     except Exception as e:
-        logger.error(f"Error getting generated content by ID: {str(e)}")
+        logger.error("Error getting generated content by ID: %s", e)
+        return None
+
+# CRUD Operations for Chat Sessions
+@timed_db_operation("save_chat_session")
+async def save_chat_session(session_data: dict, expected_version: Optional[int] = None) -> bool:
+    """Insert or replace a chat session.
+    
+    With `expected_version` the write only replaces the stored session at
+    that version; returns False when it has moved on (or is gone).
+    """
+    try:
+        db = await get_database()
+        if expected_version is None:
+            await db.chat_sessions.replace_one({"id": session_data["id"]}, session_data, upsert=True)
+            return True
+        # Sessions written before versioning have no version field
+        version = expected_version if expected_version else {"$in": [0, None]}
+        result = await db.chat_sessions.replace_one({"id": session_data["id"], "version": version}, session_data)
+        return result.matched_count == 1
+    except Exception as e:
+        logger.error("Error saving chat session: %s", e)
+        raise
+
+@timed_db_operation("get_chat_session")
+async def get_chat_session(session_id: str):
+    """Get a chat session by ID"""
+    try:
+        db = await get_database()
+        session = await db.chat_sessions.find_one({"id": session_id}, {"_id": 0})
+        return session
+    except Exception as e:
+        logger.error("Error getting chat session: %s", e)
         return None
 
+# Streaming export
+async def iter_export(
+    collection_name: str,
+    query: Dict[str, Any],
+    after: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate a collection in _id order without materializing it.
+    
+    Each document carries its _id as a string resume token; pass the last one
+    seen as `after` to continue an interrupted export.
+    """
+    db = await get_database()
+    
+    if after:
+        query = {"$and": [query, {"_id": {"$gt": ObjectId(after)}}]}
+    
+    cursor = db[collection_name].find(query).sort("_id", ASCENDING).batch_size(batch_size)
+    async for document in cursor:
+        document["_id"] = str(document["_id"])
+        yield document
+
 # CRUD Operations for Users
+@timed_db_operation("save_user")
 async def save_user(user_data: dict) -> str:
     """Save user to database"""
     try:
@@ -158,9 +346,10 @@ async def save_user(user_data: dict) -> str:
         result = await db.users.insert_one(user_data)
         return str(result.inserted_id)
     except Exception as e:
-        logger.error(f"Error saving user: {str(e)}")
+        logger.error("Error saving user: %s", e)
         raise
 
+@timed_db_operation("get_user_by_email")
 async def get_user_by_email(email: str):
     """Get user by email"""
     try:
@@ -168,9 +357,10 @@ async def get_user_by_email(email: str):
         user = await db.users.find_one({"email": email})
         return user
     except Exception as e:
-        logger.error(f"Error getting user by email: {str(e)}")
+        logger.error("Error getting user by email: %s", e)
         return None
 
+@timed_db_operation("get_user_by_id")
 async def get_user_by_id(user_id: str):
     """Get user by ID"""
     try:
@@ -178,5 +368,5 @@ async def get_user_by_id(user_id: str):
         user = await db.users.find_one({"id": user_id})
         return user
     except Exception as e:
-        logger.error(f"Error getting user by ID: {str(e)}")
+        logger.error("Error getting user by ID: %s", e)
         return None
\ No newline at end of file
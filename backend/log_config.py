@@ -0,0 +1,199 @@
+"""Non-blocking, structured logging.
+
+Records are handed to a bounded queue on the calling thread and formatted
+and written by a background listener thread, so a slow stdout or a burst of
+errors never stalls the event loop. Messages use lazy %-style arguments;
+they (and any traceback) are only rendered on the listener thread. Repeated
+warnings and errors are rate limited per call site: a burst is let through,
+after which only every Nth repeat is kept and carries the suppressed count.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from typing import Dict, Optional, Tuple
+from metrics import Counter
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" for structured output, "text" for the classic human-readable format
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Repeats of one warning/error call site let through per window before sampling
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_WINDOW_SECONDS = float(os.environ.get("LOG_RATE_LIMIT_WINDOW_SECONDS", "60"))
+# After the burst, keep one in this many repeats
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "100"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped before being written", ("reason",))
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed", "color_message"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# Arguments of the last configure_logging() call, to restart after a fork
+_settings: Optional[Tuple[str, str, object]] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} [{suppressed} similar suppressed]" if suppressed else text
+
+
+class RateLimitFilter(logging.Filter):
+    """Rate limits repeated warnings and errors per call site.
+
+    A call site is the logger, level and unformatted message template, so
+    "OpenAI API failed ...: %s" is one site however the error text varies.
+    Within each window the first `burst` records pass; after that one in
+    `sample_every` passes, annotated with how many were suppressed since
+    the last one that got through.
+    """
+
+    def __init__(
+        self,
+        burst: int = LOG_RATE_LIMIT_BURST,
+        window_seconds: float = LOG_RATE_LIMIT_WINDOW_SECONDS,
+        sample_every: int = LOG_SAMPLE_EVERY,
+        level: int = logging.WARNING
+    ):
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self.sample_every = max(1, sample_every)
+        self.level = level
+        # (logger, level, template) -> [window start, count in window, suppressed since last emitted]
+        self._sites: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window_seconds:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+                if len(self._sites) > 10000:
+                    self._prune(now)
+            else:
+                site[1] += 1
+                if site[1] > self.burst and (site[1] - self.burst) % self.sample_every:
+                    site[2] += 1
+                    LOG_RECORDS_DROPPED.inc("rate_limited")
+                    return False
+                suppressed, site[2] = site[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def _prune(self, now: float):
+        expired = [key for key, site in self._sites.items() if now - site[0] >= self.window_seconds]
+        for key in expired:
+            del self._sites[key]
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them; drops records when the queue is full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (and traceback rendering) happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None) -> logging.handlers.QueueListener:
+    """Route the root logger through the queue and start the writer thread.
+
+    Replaces any handlers already on the root logger; calling it again
+    restarts the pipeline with the new settings.
+    """
+    global _listener, _settings
+    stop_logging()
+    _settings = (level, fmt, stream)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+_restart_after_fork = False
+
+
+def _before_fork():
+    # Flush and stop the writer thread; a forked child would not inherit it
+    global _restart_after_fork
+    _restart_after_fork = _listener is not None
+    stop_logging()
+
+
+def _after_fork():
+    global _restart_after_fork
+    if _restart_after_fork:
+        _restart_after_fork = False
+        configure_logging(*_settings)
+
+
+atexit.register(stop_logging)
+os.register_at_fork(before=_before_fork, after_in_parent=_after_fork, after_in_child=_after_fork)
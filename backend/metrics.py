@@ -0,0 +1,282 @@
+"""Lightweight Prometheus-style metrics.
+
+Counters and histograms are plain dicts keyed by label values, so recording
+a sample is a dict lookup plus a bisect - cheap enough to leave on under load.
+`render_metrics()` produces the Prometheus text exposition format.
+
+Under the preforking server (serve.py) every worker has its own registry.
+With METRICS_MULTIPROC_DIR set, each worker writes its values to a per-pid
+file in that directory every METRICS_FLUSH_SECONDS, and `render_metrics()`
+sums the files of all workers, so a scrape sees totals whichever worker
+accepts it. Files of exited workers are kept so counters never go back.
+"""
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        return dict(self._values)
+
+    @staticmethod
+    def merge(total: Dict[Tuple[str, ...], float], values: Dict[Tuple[str, ...], float]):
+        for labels, value in values.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], float]] = None) -> List[str]:
+        lines = super().render()
+        for labels, value in (self.snapshot() if values is None else values).items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels"""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return int(sum(state[:-1])) if state else 0
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        return {labels: list(state) for labels, state in list(self._values.items())}
+
+    @staticmethod
+    def merge(total: Dict[Tuple[str, ...], List[float]], values: Dict[Tuple[str, ...], List[float]]):
+        for labels, state in values.items():
+            current = total.get(labels)
+            if current is None:
+                total[labels] = list(state)
+            else:
+                total[labels] = [a + b for a, b in zip(current, state)]
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], List[float]]] = None) -> List[str]:
+        lines = super().render()
+        for labels, state in (self.snapshot() if values is None else values).items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            cumulative += state[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {repr(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {int(cumulative)}")
+        return lines
+
+
+def _worker_file(directory: str, pid: int) -> Path:
+    return Path(directory) / f"metrics-{pid}.json"
+
+
+def write_worker_file(directory: Optional[str] = None):
+    """Write this process's metric values to its file in the multiprocess directory"""
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    payload = {
+        metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+        for metric in _registry
+    }
+    path = _worker_file(directory, os.getpid())
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload))
+    os.replace(tmp_path, path)
+
+
+def _read_worker_files(directory: str) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+    """Metric values summed over every worker file"""
+    metrics = {metric.name: metric for metric in _registry}
+    totals: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in metrics}
+    for path in Path(directory).glob("metrics-*.json"):
+        try:
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable metrics file %s: %s", path, e)
+            continue
+        for name, entries in payload.items():
+            metric = metrics.get(name)
+            if metric is not None:
+                metric.merge(totals[name], {tuple(labels): value for labels, value in entries})
+    return totals
+
+
+def render_metrics(directory: Optional[str] = None) -> str:
+    """Render all registered metrics in Prometheus text format, across workers if configured"""
+    directory = directory or METRICS_MULTIPROC_DIR
+    lines = []
+    if directory:
+        write_worker_file(directory)
+        totals = _read_worker_files(directory)
+        for metric in _registry:
+            lines.extend(metric.render(totals[metric.name]))
+    else:
+        for metric in _registry:
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Background thread writing this worker's metrics file periodically"""
+
+    def __init__(self, directory: Optional[str] = None, interval: float = METRICS_FLUSH_SECONDS):
+        self.directory = directory or METRICS_MULTIPROC_DIR
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                write_worker_file(self.directory)
+            except OSError as e:
+                logger.error("Error writing metrics file: %s", e)
+
+    def start(self):
+        if not self.directory or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            write_worker_file(self.directory)
+        except OSError as e:
+            logger.error("Error writing metrics file: %s", e)
+
+
+def _reset_after_fork():
+    # Values recorded in the preloading master would otherwise be counted once per worker
+    for metric in _registry:
+        metric._values.clear()
+
+
+if METRICS_MULTIPROC_DIR:
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+metrics_exporter = MetricsExporter()
+
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+
+# LLM
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM call latency by model and task", ("model", "task"), buckets=LLM_BUCKETS
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls by model and task", ("model", "task"))
+LLM_CACHE_REQUESTS = Counter("llm_cache_requests_total", "Persistent LLM cache lookups by task and result", ("task", "result"))
+LLM_TOKENS = Counter("llm_tokens_total", "Locally counted LLM tokens by model and direction", ("model", "direction"))
+
+# Content fallbacks
+CONTENT_FALLBACKS = Counter("content_fallback_total", "Generations served from demo or fallback content", ("path",))
+
+# MongoDB
+DB_OPERATION_DURATION = Histogram(
+    "db_operation_duration_seconds", "MongoDB operation latency by operation", ("operation",)
+)
+DB_OPERATION_ERRORS = Counter("db_operation_errors_total", "Failed MongoDB operations by operation", ("operation",))
+
+
+def timed_db_operation(operation: str):
+    """Decorator recording latency, failures and a trace span for an async database operation"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with span(f"db.{operation}"):
+                    return await func(*args, **kwargs)
+            except Exception:
+                DB_OPERATION_ERRORS.inc(operation)
+                raise
+            finally:
+                DB_OPERATION_DURATION.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, NamedTuple, Tuple
 from datetime import datetime
+import sys
 import uuid
 
 # User Models
@@ -50,6 +51,154 @@ class Trend(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Internal trend records: snapshots hold these, and they become `Trend` (or
+# its dict form) only at the API edge. Slots and tuples instead of nested
+# pydantic models; repeated strings are interned so records share them.
+class PlatformMetrics(NamedTuple):
+    posts: int = 0
+    mentions: int = 0
+    sentiment: float = 0.0
+    videos: int = 0
+    totalViews: int = 0
+    avgViews: int = 0
+    upvotes: int = 0
+    comments: int = 0
+    engagement: float = 0.0
+
+class EngagementMetrics(NamedTuple):
+    twitter: PlatformMetrics = PlatformMetrics()
+    youtube: PlatformMetrics = PlatformMetrics()
+    reddit: PlatformMetrics = PlatformMetrics()
+    tiktok: PlatformMetrics = PlatformMetrics()
+
+assert PlatformMetrics._fields == tuple(PlatformEngagement.__fields__)
+assert EngagementMetrics._fields == tuple(TrendEngagement.__fields__)
+
+def _engagement_dict(engagement: EngagementMetrics, include: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    result = {}
+    for platform, metrics in zip(EngagementMetrics._fields, engagement):
+        selected = True if include is None else include.get(platform)
+        if selected is True:
+            result[platform] = metrics._asdict()
+        elif selected:
+            result[platform] = {name: value for name, value in zip(PlatformMetrics._fields, metrics) if name in selected}
+    return result
+
+def _as_datetime(value: Any) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+class TrendRecord:
+    """Lightweight internal form of a `Trend`, with the same field names.
+
+    Built without validation from trusted data (our own snapshots and trend
+    builder); `to_dict` gives the same output as `Trend.dict` and `to_model`
+    the validated model, for responses and services that need one.
+    """
+    __slots__ = tuple(Trend.__fields__)
+
+    def __init__(
+        self,
+        id: str,
+        topic: str,
+        platform: str,
+        hashtags: Tuple[str, ...],
+        contentScore: int,
+        trendVelocity: str,
+        engagement: EngagementMetrics,
+        keyInsights: Tuple[str, ...],
+        suggestedAngles: Tuple[str, ...],
+        timeframe: str,
+        category: str,
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None
+    ):
+        self.id = id
+        self.topic = topic
+        self.platform = sys.intern(platform)
+        self.hashtags = tuple(hashtags)
+        self.contentScore = contentScore
+        self.trendVelocity = sys.intern(trendVelocity)
+        self.engagement = engagement
+        self.keyInsights = tuple(keyInsights)
+        self.suggestedAngles = tuple(suggestedAngles)
+        self.timeframe = sys.intern(timeframe)
+        self.category = sys.intern(category)
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = updated_at or self.created_at
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrendRecord":
+        """Record from `Trend.dict()`/`to_dict()` output, or its JSON round trip"""
+        engagement = data.get("engagement") or {}
+        return cls(
+            id=data["id"],
+            topic=data["topic"],
+            platform=data["platform"],
+            hashtags=data.get("hashtags", ()),
+            contentScore=data["contentScore"],
+            trendVelocity=data["trendVelocity"],
+            engagement=EngagementMetrics(*(
+                PlatformMetrics(**engagement.get(platform, {})) for platform in EngagementMetrics._fields
+            )),
+            keyInsights=data.get("keyInsights", ()),
+            suggestedAngles=data.get("suggestedAngles", ()),
+            timeframe=data["timeframe"],
+            category=data["category"],
+            created_at=_as_datetime(data.get("created_at")),
+            updated_at=_as_datetime(data.get("updated_at"))
+        )
+
+    def to_dict(self, include: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Same as `Trend.dict(include=...)`, without building the model"""
+        result = {}
+        for name in self.__slots__:
+            selected = True if include is None else include.get(name)
+            if not selected:
+                continue
+            value = getattr(self, name)
+            if name == "engagement":
+                value = _engagement_dict(value, None if selected is True else selected)
+            elif isinstance(value, tuple):
+                value = list(value)
+            result[name] = value
+        return result
+
+    def to_model(self) -> Trend:
+        return Trend(**self.to_dict())
+
+# Fields needed to render a trend card in list views; dotted paths select nested fields
+TREND_SUMMARY_FIELDS = [
+    "id", "topic", "platform", "category", "hashtags", "contentScore", "trendVelocity",
+    "timeframe", "keyInsights", "engagement.twitter.mentions", "engagement.youtube.videos", "created_at"
+]
+
+_NESTED_TREND_MODELS = {
+    "Trend": {"engagement": TrendEngagement},
+    "TrendEngagement": {name: PlatformEngagement for name in TrendEngagement.__fields__},
+}
+
+def trend_field_include(paths: List[str]) -> Dict[str, Any]:
+    """Validate dotted trend field paths and build a nested include for .dict()"""
+    include: Dict[str, Any] = {}
+    for path in paths:
+        model = Trend
+        node = include
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            if part not in model.__fields__:
+                raise ValueError(f"Unknown trend field: {path}")
+            if depth == len(parts) - 1:
+                node[part] = True
+                break
+            model = _NESTED_TREND_MODELS.get(model.__name__, {}).get(part)
+            if model is None:
+                raise ValueError(f"Unknown trend field: {path}")
+            child = node.get(part)
+            if child is True:
+                break  # the whole parent is already included
+            node = node.setdefault(part, {})
+    return include
+
 # Content Generation Models
 class ContentSection(BaseModel):
     section: str
@@ -72,6 +221,8 @@ class GeneratedContent(BaseModel):
     hashtags: List[str]
     estimatedViews: str
     difficulty: str
+    promptTokens: Optional[int] = None
+    reusedFrom: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class ContentGenerationRequest(BaseModel):
@@ -80,6 +231,12 @@ class ContentGenerationRequest(BaseModel):
     tone: str
     custom_prompt: Optional[str] = None
     session_id: Optional[str] = None
+    allow_similar: bool = True
+
+class SectionRegenerationRequest(BaseModel):
+    target: Literal["title", "hook", "section"]
+    section_index: Optional[int] = None
+    instructions: Optional[str] = None
 
 # Content Template Models
 class ContentTemplate(BaseModel):
@@ -94,7 +251,12 @@ class ContentTemplate(BaseModel):
 class ChatSession(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
+    content: Optional[GeneratedContent] = None
+    # Compacted digest of turns dropped from `messages`
+    summary: str = ""
     messages: List[Dict[str, Any]] = Field(default_factory=list)
+    # Bumped on every save; writes are conditional on the version read
+    version: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
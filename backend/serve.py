@@ -0,0 +1,192 @@
+"""Production entry point: preload the app once, then fork a worker per core.
+
+    python serve.py
+
+Workers share the listening socket and everything imported before the fork
+(compiled templates, the scoring model, ...) copy-on-write; each one runs its
+own event loop and startup hooks. The trend snapshot is shared through a
+memory-mapped file (see services/snapshot_file.py), so only one worker
+enriches it. The master only supervises: it restarts workers that die and
+shuts them down on SIGTERM/SIGINT.
+
+Metrics are per worker; each one writes them to a file under
+METRICS_MULTIPROC_DIR (a fresh temporary directory unless set) and /metrics
+sums all files, so any worker answers a scrape with totals (see metrics.py).
+Totals lag by up to METRICS_FLUSH_SECONDS for workers other than the one
+answering.
+"""
+import os
+import sys
+import time
+import math
+import signal
+import glob
+import shutil
+import socket
+import logging
+import tempfile
+from typing import Dict, Optional
+
+import uvicorn
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "8001"))
+# Worker count; detected from the CPUs available to the process when unset
+WEB_CONCURRENCY = os.environ.get("WEB_CONCURRENCY")
+LISTEN_BACKLOG = int(os.environ.get("LISTEN_BACKLOG", "2048"))
+WORKER_SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get("WORKER_SHUTDOWN_TIMEOUT_SECONDS", "30"))
+# A worker dying sooner than this after starting is restarted with a delay
+WORKER_MIN_UPTIME_SECONDS = 5.0
+
+logger = logging.getLogger("serve")
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container, if one is set (cgroup v2, then v1)"""
+    try:
+        quota, period = open("/sys/fs/cgroup/cpu.max").read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read())
+        period = int(open("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def detect_worker_count() -> int:
+    """WEB_CONCURRENCY if set, else one worker per CPU available to the process"""
+    if WEB_CONCURRENCY:
+        return max(1, int(WEB_CONCURRENCY))
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def bind_socket(host: str = HOST, port: int = PORT) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks workers serving a preloaded app and keeps `workers` of them running"""
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+
+    def _run_worker(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        # log_config=None keeps uvicorn's loggers on our structured pipeline
+        config = uvicorn.Config(self.app, log_config=None, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker %s crashed", os.getpid())
+                status = 1
+            finally:
+                logging.shutdown()
+                os._exit(status)
+        self._children[pid] = time.monotonic()
+        logger.info("Started worker %s", pid)
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Stopping %s workers", len(self._children))
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        signal.alarm(math.ceil(WORKER_SHUTDOWN_TIMEOUT_SECONDS))
+
+    def _kill_remaining(self, signum, frame):
+        for pid in self._children:
+            logger.warning("Worker %s did not shut down in time, killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGALRM, self._kill_remaining)
+
+        logger.info("Serving on %s:%s with %s workers", HOST, PORT, self.workers)
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started_at = self._children.pop(pid, None)
+            if started_at is None or self._stopping:
+                continue
+
+            logger.error("Worker %s exited with status %s, restarting", pid, os.waitstatus_to_exitcode(status))
+            # Don't spin when workers die right after starting
+            if time.monotonic() - started_at < WORKER_MIN_UPTIME_SECONDS:
+                time.sleep(1)
+            if not self._stopping:
+                self._spawn()
+
+        self.sock.close()
+        logger.info("All workers stopped")
+
+
+def prepare_metrics_dir() -> str:
+    """Create (or empty) the directory workers share their metrics through"""
+    directory = os.environ.get("METRICS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # Files from a previous run would be summed into this one's counters
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            os.remove(path)
+    else:
+        directory = tempfile.mkdtemp(prefix="trendscript-metrics-")
+        os.environ["METRICS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def main():
+    # Before the app import: metrics read the directory at import time
+    temporary_metrics_dir = "METRICS_MULTIPROC_DIR" not in os.environ
+    metrics_dir = prepare_metrics_dir()
+    # Preload: import the app (and everything it builds at import time) once
+    from server import app
+
+    sock = bind_socket()
+    Supervisor(app, sock, detect_worker_count()).run()
+    if temporary_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
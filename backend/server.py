@@ -1,30 +1,42 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from bson import ObjectId
+from datetime import datetime
+import json
 from dotenv import load_dotenv
 from pathlib import Path
 import os
+import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Optional
 import uuid
 
 # Import models and services
 from models import (
-    Trend, TrendResponse, GeneratedContent, ContentGenerationRequest, 
-    ContentGenerationResponse, ApiResponse, User, UserCreate, ContentTemplate
+    Trend, TrendResponse, GeneratedContent, ContentGenerationRequest, SectionRegenerationRequest,
+    ContentGenerationResponse, ApiResponse, User, UserCreate, ContentTemplate,
+    TREND_SUMMARY_FIELDS, trend_field_include
 )
 from services.trend_service import TrendService
 from services.ai_service import AIService
-from database import connect_db, close_db
+from services.pregenerator import ContentPregenerator, PREGEN_ENABLED
+from services.session_store import SessionConflict, session_store
+from services.idempotency import IdempotencyConflict, idempotency_store, request_fingerprint
+from database import connect_db, close_db, iter_export, save_generated_content
+from metrics import HTTP_REQUEST_DURATION, CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics, metrics_exporter
+from tracing import start_trace, should_sample, trace_store
+from admission import AdmissionRejected, generation_admission, generation_rate_limiter
+from log_config import configure_logging
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: queued, structured and rate limited (see log_config)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -42,9 +54,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-trend_service = TrendService()
-ai_service = AIService()
+# Request latency metrics
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        # Label by route template so path parameters don't explode cardinality
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route_path, status)
+
+def _is_admin_token(token: Optional[str]) -> bool:
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    return bool(admin_token) and token == admin_token
+
+# Opt-in request tracing and profiling
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace_requested = request.headers.get("x-trace") == "1" or request.query_params.get("trace") == "1"
+    profile_requested = request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+    profile = profile_requested and _is_admin_token(request.headers.get("x-admin-token"))
+    
+    if not (trace_requested or profile or should_sample()):
+        return await call_next(request)
+    
+    with start_trace(f"{request.method} {request.url.path}", profile=profile) as record:
+        response = await call_next(request)
+        record.root.attributes["status"] = response.status_code
+    response.headers["X-Trace-Id"] = record.id
+    return response
+
+# Services are built on first use and shared, so importing the app stays cheap
+_ai_service: Optional[AIService] = None
+_trend_service: Optional[TrendService] = None
+_pregenerator: Optional[ContentPregenerator] = None
+
+def get_ai_service() -> AIService:
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+    return _ai_service
+
+def get_trend_service() -> TrendService:
+    global _trend_service
+    if _trend_service is None:
+        _trend_service = TrendService(ai_service=get_ai_service())
+    return _trend_service
+
+def get_pregenerator() -> ContentPregenerator:
+    global _pregenerator
+    if _pregenerator is None:
+        _pregenerator = ContentPregenerator(get_trend_service(), get_ai_service())
+    return _pregenerator
 
 # Content templates data
 CONTENT_TEMPLATES = [
@@ -95,6 +161,78 @@ async def get_current_user():
     """Get current user - simplified for MVP, returns anonymous user"""
     return {"id": "anonymous_user", "email": "user@example.com", "name": "Anonymous User"}
 
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Restrict debug endpoints to holders of ADMIN_TOKEN"""
+    if not _is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+def _client_key(request: Request, current_user: dict) -> str:
+    """Per-client key for rate limits and idempotency scopes"""
+    user_key = current_user["id"]
+    if user_key == "anonymous_user" and request.client:
+        user_key = f"ip:{request.client.host}"
+    return user_key
+
+def _idempotency_scope(request: Request, current_user: dict) -> str:
+    return f"{_client_key(request, current_user)}:{request.url.path}"
+
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _check_generation_rate(user_key: str):
+    try:
+        generation_rate_limiter.check(user_key)
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+
+@asynccontextmanager
+async def _generation_slot(user_key: str):
+    """Hold a slot in the generation pool, or raise 503"""
+    try:
+        async with generation_admission.admit():
+            yield
+    except AdmissionRejected as e:
+        # Requests shed by the server don't count against the user's rate
+        generation_rate_limiter.refund(user_key)
+        raise _admission_error(e)
+
+async def admit_generation(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Admission control for LLM-backed routes: per-user rate limit plus bounded concurrency"""
+    user_key = _client_key(request, current_user)
+    _check_generation_rate(user_key)
+    async with _generation_slot(user_key):
+        yield
+
+async def admit_content_generation(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Admission control for generate-content.
+    
+    Idempotent requests only pass the rate limit here: their generation runs
+    detached from the request and takes its pool slot itself, so it stays
+    bounded after the client disconnects.
+    """
+    user_key = _client_key(request, current_user)
+    if not idempotency_key:
+        _check_generation_rate(user_key)
+        async with _generation_slot(user_key):
+            yield
+        return
+    
+    # Retries of a request this worker is running (or has finished) cost nothing
+    if not idempotency_store.is_known(_idempotency_scope(request, current_user), idempotency_key):
+        _check_generation_rate(user_key)
+    yield
+
 # API Routes
 
 @api_router.get("/")
@@ -102,34 +240,57 @@ async def root():
     """Health check endpoint"""
     return {"message": "TrendScript AI API is running", "version": "1.0.0"}
 
+@api_router.get("/ready")
+async def readiness():
+    """Readiness endpoint - ready once a trend snapshot can be served"""
+    warm = _trend_service is not None and _trend_service.is_warm
+    content = {
+        "ready": warm,
+        "snapshotAge": round(_trend_service.snapshot_age, 1) if warm else None
+    }
+    return JSONResponse(status_code=200 if warm else 503, content=content)
+
 @api_router.get("/trends", response_model=ApiResponse)
 async def get_trends(
     category: Optional[str] = Query(None, description="Filter by category"),
     platform: Optional[str] = Query(None, description="Filter by platform"),
     search: Optional[str] = Query(None, description="Search query"),
     limit: int = Query(20, description="Number of trends to return"),
-    page: int = Query(1, description="Page number")
+    page: int = Query(1, description="Page number"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (dotted paths for nested fields)"),
+    view: Optional[str] = Query(None, description="'summary' for card-sized trends")
 ):
     """Get trending topics with filters"""
     try:
         skip = (page - 1) * limit
         
+        # Resolve the sparse fieldset before doing any work
+        include = None
+        if fields or view:
+            if view and view != "summary":
+                raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+            field_paths = [f.strip() for f in fields.split(",") if f.strip()] if fields else TREND_SUMMARY_FIELDS
+            try:
+                include = trend_field_include(field_paths)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
         if search:
-            trends = await trend_service.search_trends(
+            trends = await get_trend_service().search_trends(
                 query=search,
                 category=category,
                 platform=platform,
                 limit=limit
             )
         else:
-            trends = await trend_service.get_trending_topics(
+            trends = await get_trend_service().get_trending_topics(
                 category=category,
                 platform=platform,
                 limit=limit
             )
         
-        # Convert to dict for response
-        trends_data = [trend.dict() for trend in trends]
+        # Convert to dict for response, serializing only the requested fields
+        trends_data = [trend.to_dict(include=include) for trend in trends]
         
         return ApiResponse(
             success=True,
@@ -142,15 +303,74 @@ async def get_trends(
             message="Trends retrieved successfully"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting trends: {str(e)}")
+        logger.error("Error getting trends: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving trends: {str(e)}")
 
+TREND_STREAM_KEEPALIVE_SECONDS = 15
+
+@api_router.get("/trends/stream")
+async def stream_trends(
+    request: Request,
+    since: Optional[int] = Query(None, description="Last snapshot version received"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events with trend snapshot deltas (added, removed, updated)"""
+    trend_service = get_trend_service()
+    await trend_service.get_snapshot()
+    feed = trend_service.change_feed
+    
+    # EventSource reconnects send Last-Event-ID; explicit ?since= wins
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    
+    async def events():
+        client_version = since
+        while not await request.is_disconnected():
+            deltas = feed.deltas_since(client_version) if client_version is not None else None
+            if deltas is None:
+                # New client, or too far behind: send the full state once
+                yield f"id: {feed.version}\nevent: snapshot\ndata: {feed.snapshot_event()}\n\n"
+                client_version = feed.version
+            else:
+                for version, payload in deltas:
+                    yield f"id: {version}\nevent: delta\ndata: {payload}\n\n"
+                    client_version = version
+            
+            if not await feed.wait_for_change(client_version, TREND_STREAM_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+            # Trigger a background refresh when the snapshot goes stale
+            await trend_service.get_snapshot()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/trends/facets", response_model=ApiResponse)
+async def get_trend_facets():
+    """Trend counts per category, platform and score bucket, for dashboard filters"""
+    try:
+        facets = await get_trend_service().get_facets()
+        
+        return ApiResponse(
+            success=True,
+            data=facets,
+            message="Trend facets retrieved successfully"
+        )
+        
+    except Exception as e:
+        logger.error("Error getting trend facets: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error retrieving trend facets: {str(e)}")
+
 @api_router.get("/trends/{trend_id}", response_model=ApiResponse)
 async def get_trend(trend_id: str):
     """Get a specific trend by ID"""
     try:
-        trend = await trend_service.get_trend_by_id(trend_id)
+        trend = await get_trend_service().get_trend_by_id(trend_id)
         
         if not trend:
             raise HTTPException(status_code=404, detail="Trend not found")
@@ -164,46 +384,122 @@ async def get_trend(trend_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting trend: {str(e)}")
+        logger.error("Error getting trend: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving trend: {str(e)}")
 
-@api_router.post("/generate-content", response_model=ApiResponse)
+@api_router.post("/generate-content", response_model=ApiResponse, dependencies=[Depends(admit_content_generation)])
 async def generate_content(
     request: ContentGenerationRequest,
-    current_user: dict = Depends(get_current_user)
+    http_request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    """Generate AI-powered content script"""
-    try:
+    """Generate AI-powered content script.
+    
+    With an Idempotency-Key header, retries of the same request attach to the
+    running generation or get its stored result instead of generating again.
+    """
+    async def generate():
         # Get the trend
-        trend = await trend_service.get_trend_by_id(request.trend_id)
+        trend = await get_trend_service().get_trend_by_id(request.trend_id)
         if not trend:
             raise HTTPException(status_code=404, detail="Trend not found")
         
+        get_pregenerator().record_request(request.template_id, request.tone)
+        
         # Generate content using AI
-        generated_content = await ai_service.generate_content_script(
+        generated_content = await get_ai_service().generate_content_script(
             trend=trend,
             request=request,
-            user_id=current_user["id"]
+            user_id=current_user["id"],
+            client_key=_client_key(http_request, current_user)
         )
         
-        # Save to database (optional for MVP)
-        # await database.save_generated_content(generated_content.dict())
+        # Persist once per generation (retries replay this closure's result);
+        # a storage failure shouldn't cost the user their script
+        try:
+            await save_generated_content(generated_content.dict())
+        except Exception as e:
+            logger.error("Error persisting generated content %s: %s", generated_content.id, e)
+        
+        # Open a refinement session so parts of the script can be regenerated
+        await session_store.create(generated_content)
+        return generated_content.dict()
+    
+    async def admitted_generate():
+        async with _generation_slot(_client_key(http_request, current_user)):
+            return await generate()
+    
+    try:
+        if idempotency_key:
+            content, replayed = await idempotency_store.run(
+                _idempotency_scope(http_request, current_user),
+                idempotency_key,
+                request_fingerprint(request.dict()),
+                admitted_generate
+            )
+            if replayed:
+                response.headers["Idempotent-Replayed"] = "true"
+        else:
+            content = await generate()
         
         return ApiResponse(
             success=True,
             data={
-                "id": generated_content.id,
-                "content": generated_content.dict()
+                "id": content["id"],
+                "content": content
             },
             message="Content generated successfully"
         )
         
     except HTTPException:
         raise
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error generating content: {str(e)}")
+        logger.error("Error generating content: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating content: {str(e)}")
 
+@api_router.post("/content/{content_id}/regenerate", response_model=ApiResponse, dependencies=[Depends(admit_generation)])
+async def regenerate_content_part(
+    content_id: str,
+    request: SectionRegenerationRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Regenerate the title, hook or one section of a generated script"""
+    try:
+        session = await session_store.get(content_id)
+        if not session or not session.content or session.user_id != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Content session not found")
+        
+        content = await get_ai_service().regenerate_part(session, request)
+        part = content.outline[request.section_index].dict() if request.target == "section" else getattr(content, request.target)
+        
+        return ApiResponse(
+            success=True,
+            data={
+                "id": content.id,
+                "target": request.target,
+                "section_index": request.section_index,
+                "part": part,
+                "content": content.dict()
+            },
+            message="Content regenerated successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except SessionConflict as e:
+        raise HTTPException(status_code=409, detail=f"{e}; reload and try again")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Error regenerating content: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error regenerating content: {str(e)}")
+
 @api_router.get("/content-templates", response_model=ApiResponse)
 async def get_content_templates():
     """Get available content templates"""
@@ -214,7 +510,7 @@ async def get_content_templates():
             message="Content templates retrieved successfully"
         )
     except Exception as e:
-        logger.error(f"Error getting content templates: {str(e)}")
+        logger.error("Error getting content templates: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving content templates: {str(e)}")
 
 @api_router.get("/tone-options", response_model=ApiResponse)
@@ -236,7 +532,7 @@ async def get_tone_options():
             message="Tone options retrieved successfully"
         )
     except Exception as e:
-        logger.error(f"Error getting tone options: {str(e)}")
+        logger.error("Error getting tone options: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving tone options: {str(e)}")
 
 @api_router.get("/user/content-history", response_model=ApiResponse)
@@ -253,7 +549,7 @@ async def get_user_content_history(
             message="Content history retrieved successfully"
         )
     except Exception as e:
-        logger.error(f"Error getting content history: {str(e)}")
+        logger.error("Error getting content history: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving content history: {str(e)}")
 
 @api_router.get("/stats", response_model=ApiResponse)
@@ -261,7 +557,7 @@ async def get_platform_stats():
     """Get platform statistics"""
     try:
         # Get current trends for stats
-        trends = await trend_service.get_trending_topics(limit=100)
+        trends = await get_trend_service().get_trending_topics(limit=100)
         
         total_trends = len(trends)
         high_potential = len([t for t in trends if t.contentScore >= 85])
@@ -282,31 +578,150 @@ async def get_platform_stats():
         )
         
     except Exception as e:
-        logger.error(f"Error getting platform stats: {str(e)}")
+        logger.error("Error getting platform stats: %s", e)
         raise HTTPException(status_code=500, detail=f"Error retrieving platform statistics: {str(e)}")
 
+@api_router.get("/debug/traces", response_model=ApiResponse, dependencies=[Depends(require_admin)])
+async def list_traces(limit: int = Query(20, description="Number of traces to return")):
+    """List recently recorded traces"""
+    return ApiResponse(
+        success=True,
+        data={"traces": trace_store.recent(limit)},
+        message="Traces retrieved successfully"
+    )
+
+@api_router.get("/debug/traces/{trace_id}", response_model=ApiResponse, dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str):
+    """Get a recorded span tree as JSON"""
+    record = trace_store.get(trace_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    
+    return ApiResponse(
+        success=True,
+        data=record.to_dict(),
+        message="Trace retrieved successfully"
+    )
+
+@api_router.get("/debug/traces/{trace_id}/profile", dependencies=[Depends(require_admin)])
+async def get_trace_profile(trace_id: str):
+    """Get the sampled stacks of a profiled request in folded (flamegraph) format"""
+    record = trace_store.get(trace_id)
+    if not record or record.profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return Response(content=record.profile, media_type="text/plain")
+
+@api_router.get("/debug/llm-routes", response_model=ApiResponse, dependencies=[Depends(require_admin)])
+async def get_llm_routes():
+    """Current adaptive token limits per LLM route"""
+    return ApiResponse(
+        success=True,
+        data=get_ai_service().model_router.limits(),
+        message="LLM routes retrieved successfully"
+    )
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _ndjson_export(collection_name: str, query: dict, after: Optional[str]) -> StreamingResponse:
+    """Stream a collection as NDJSON, one document per line"""
+    if after and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Invalid resume token")
+    
+    async def rows():
+        async for document in iter_export(collection_name, query, after=after):
+            yield json.dumps(document, default=_json_default) + "\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@api_router.get("/export/trends", dependencies=[Depends(require_admin)])
+async def export_trends(
+    category: Optional[str] = Query(None, description="Filter by category"),
+    platform: Optional[str] = Query(None, description="Filter by platform"),
+    min_score: Optional[int] = Query(None, description="Minimum content score"),
+    after: Optional[str] = Query(None, description="Resume after this _id")
+):
+    """Export trends as NDJSON"""
+    query = {}
+    if category:
+        query["category"] = category
+    if platform:
+        query["platform"] = platform
+    if min_score is not None:
+        query["contentScore"] = {"$gte": min_score}
+    
+    return _ndjson_export("trends", query, after)
+
+@api_router.get("/export/generated-content", dependencies=[Depends(require_admin)])
+async def export_generated_content(
+    user_id: Optional[str] = Query(None, description="Filter by user"),
+    trend_id: Optional[str] = Query(None, description="Filter by trend"),
+    template_id: Optional[str] = Query(None, description="Filter by template"),
+    since: Optional[datetime] = Query(None, description="Only content created at or after this time"),
+    after: Optional[str] = Query(None, description="Resume after this _id")
+):
+    """Export generated content as NDJSON"""
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    if trend_id:
+        query["trend_id"] = trend_id
+    if template_id:
+        query["template_id"] = template_id
+    if since:
+        query["created_at"] = {"$gte": since}
+    
+    return _ndjson_export("generated_content", query, after)
+
 # Include the API router
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # Application lifecycle events
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application"""
     try:
+        # Publish this worker's metrics for cross-worker scrapes (no-op unless METRICS_MULTIPROC_DIR is set)
+        metrics_exporter.start()
         await connect_db()
+        
+        # Serve the last snapshot right away; otherwise warm up in the background
+        trend_service = get_trend_service()
+        if not trend_service.load_snapshot():
+            app.state.warmup_task = asyncio.create_task(trend_service.refresh_snapshot())
+        
+        # Fill generation caches for hot trends while the LLM pool is idle
+        if PREGEN_ENABLED:
+            get_pregenerator().start()
+        
         logger.info("TrendScript AI API started successfully")
     except Exception as e:
-        logger.error(f"Error starting application: {str(e)}")
+        logger.error("Error starting application: %s", e)
         raise
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown"""
     try:
+        if _pregenerator is not None:
+            await _pregenerator.stop()
+        if _trend_service is not None:
+            _trend_service.save_snapshot()
         await close_db()
+        if _ai_service is not None:
+            _ai_service.response_cache.close()
+        metrics_exporter.stop()
         logger.info("TrendScript AI API shut down successfully")
     except Exception as e:
-        logger.error(f"Error shutting down application: {str(e)}")
+        logger.error("Error shutting down application: %s", e)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,157 +1,336 @@
 import os
+import json
+import time
+import hashlib
 import logging
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-from models import Trend, ContentGenerationRequest, GeneratedContent, ContentSection
+from models import Trend, ContentGenerationRequest, GeneratedContent, ContentSection, ChatSession, SectionRegenerationRequest
+from tracing import traced
+from metrics import LLM_REQUEST_DURATION, LLM_ERRORS, LLM_TOKENS, LLM_CACHE_REQUESTS, CONTENT_FALLBACKS
+from .prompt_builder import build_content_prompt, build_refinement_prompt, count_tokens
+from .similarity_cache import SimilarityCache
+from .llm_cache import LlmResponseCache, ReplayMissError, cache_key
+from .shared_cache import shared_cache
+from .model_router import ModelRouter, Route
+from .demo_templates import demo_content
+from .session_store import session_store
 
 logger = logging.getLogger(__name__)
 
+GENERATION_CACHE_TTL_SECONDS = int(os.environ.get("GENERATION_CACHE_TTL_SECONDS", "3600"))
+PREGENERATION_USER_ID = "system_pregenerator"
+
+T = TypeVar("T")
+
+
+class InvalidResponseError(RuntimeError):
+    """The LLM returned output that could not be parsed"""
+
+
 class AIService:
     def __init__(self):
         self.api_key = os.environ.get('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
+        self.similarity_cache = SimilarityCache()
+        self.response_cache = LlmResponseCache()
+        self.model_router = ModelRouter()
     
+    @traced("ai_service.generate_content_script")
     async def generate_content_script(
         self, 
         trend: Trend, 
         request: ContentGenerationRequest,
-        user_id: str
+        user_id: str,
+        client_key: str = None
     ) -> GeneratedContent:
-        """Generate AI-powered content script based on trend and user preferences"""
+        """Generate AI-powered content script based on trend and user preferences.
+        
+        `client_key` identifies who may be served scripts reused for this
+        request's custom prompt (defaults to `user_id`).
+        """
         
         try:
             # Create unique session ID for this generation
             session_id = request.session_id or f"content_gen_{trend.id}_{request.template_id}"
             
+            # Serve a recent generation for a near-identical request if allowed
+            similarity_key = self._similarity_key(trend.id, request.template_id, request.tone, request.custom_prompt, client_key or user_id)
+            if request.allow_similar:
+                cached = self.similarity_cache.lookup(similarity_key, request.custom_prompt)
+                if cached:
+                    cached_content, score = cached
+                    logger.info("Reusing generated content %s (similarity %.2f)", cached_content.id, score)
+                    return self._reuse_generated_content(cached_content, request, user_id, session_id)
+            
             # Try to use real OpenAI API first
             try:
-                # Initialize LLM Chat
-                chat = LlmChat(
-                    api_key=self.api_key,
-                    session_id=session_id,
-                    system_message=self._get_system_message(request.template_id, request.tone)
-                ).with_model("openai", "gpt-4o").with_max_tokens(4096)
-                
-                # Create user prompt
-                user_prompt = self._create_content_prompt(trend, request)
-                user_message = UserMessage(text=user_prompt)
+                if request.allow_similar:
+                    generated_content = await self._generate_shared(trend, request, user_id, session_id, owner=similarity_key[3])
+                else:
+                    generated_content = await self._generate_with_llm(trend, request, user_id, session_id)
                 
-                # Generate content with AI
-                ai_response = await chat.send_message(user_message)
-                
-                # Parse AI response and structure it
-                generated_content = self._parse_ai_response(
-                    ai_response, 
-                    trend, 
-                    request, 
-                    user_id, 
-                    session_id
-                )
-                
-                logger.info("Successfully generated content using OpenAI API")
+                self.similarity_cache.store(similarity_key, request.custom_prompt, generated_content)
                 return generated_content
                 
+            except InvalidResponseError as parse_error:
+                # Only here, so fallback scripts never reach the shared or similarity caches
+                logger.error("Error parsing AI response: %s", parse_error)
+                return self._create_fallback_content(trend, request, user_id, session_id)
             except Exception as openai_error:
-                logger.warning(f"OpenAI API failed, falling back to demo mode: {str(openai_error)}")
+                logger.warning("OpenAI API failed, falling back to demo mode: %s", openai_error)
                 # Fall back to enhanced demo content
                 return self._create_enhanced_demo_content(trend, request, user_id, session_id)
             
         except Exception as e:
-            logger.error(f"Error generating content: {str(e)}")
+            logger.error("Error generating content: %s", e)
             # Final fallback
             return self._create_fallback_content(trend, request, user_id, session_id)
     
-    def _get_system_message(self, template_id: str, tone: str) -> str:
-        """Get system message based on content template and tone"""
-        
-        template_instructions = {
-            "youtube-explainer": "You are an expert YouTube content creator specializing in 10-15 minute educational videos. Create detailed, engaging scripts with clear timestamps, hooks, and actionable content.",
-            "blog-post": "You are a professional content writer specializing in comprehensive blog posts. Create well-structured, SEO-optimized content with clear headings and valuable insights.",
-            "social-thread": "You are a social media expert creating viral Twitter/LinkedIn threads. Focus on concise, impactful points that drive engagement and sharing.",
-            "podcast-guide": "You are a podcast producer creating structured discussion guides. Focus on natural conversation flow, thought-provoking questions, and key talking points.",
-            "short-form": "You are a TikTok/Instagram Reels creator. Focus on hook-heavy, fast-paced content that captures attention in the first 3 seconds."
-        }
-        
-        tone_instructions = {
-            "professional": "Use authoritative, business-focused language with industry expertise.",
-            "casual": "Use friendly, conversational tone like talking to a friend.",
-            "humorous": "Include appropriate humor, wit, and light-hearted commentary.",
-            "educational": "Focus on teaching and explaining concepts clearly.",
-            "controversial": "Present provocative viewpoints while maintaining respect.",
-            "inspirational": "Use motivational and uplifting language that inspires action."
-        }
-        
-        base_instruction = template_instructions.get(template_id, template_instructions["youtube-explainer"])
-        tone_instruction = tone_instructions.get(tone, tone_instructions["professional"])
-        
-        return f"""
-        {base_instruction}
-        
-        Tone: {tone_instruction}
-        
-        Always provide:
-        1. A compelling, clickable title
-        2. An attention-grabbing hook
-        3. Detailed content outline with timestamps (if applicable)
-        4. Key points to emphasize
-        5. SEO keywords and hashtags
-        6. Performance predictions
-        
-        Format your response as a structured JSON object with all required fields.
+    @staticmethod
+    def _similarity_key(trend_id: str, template_id: str, tone: str, custom_prompt: str, client_key: str) -> Tuple[str, str, str, str]:
+        """Similarity cache bucket; scripts for a custom prompt are only reused for its author"""
+        owner = client_key if custom_prompt and custom_prompt.strip() else ""
+        return (trend_id, template_id, tone, owner)
+    
+    async def _generate_with_llm(
+        self,
+        trend: Trend,
+        request: ContentGenerationRequest,
+        user_id: str,
+        session_id: str
+    ) -> GeneratedContent:
+        """Generate a content script with the LLM; raises InvalidResponseError for unusable output"""
+        
+        # Build prompts from precompiled templates within the token budget
+        prompt = build_content_prompt(trend, request)
+        
+        # Initialize LLM Chat on the model tier and token budget for this template
+        route = self.model_router.route("content", request.template_id)
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=prompt.system_message
+        ).with_model(route.provider, route.model).with_max_tokens(route.max_tokens)
+        
+        user_message = UserMessage(text=prompt.user_prompt)
+        
+        # Generate content with AI, parsed into a structured script before it is cached
+        generated_content = await self._send_message(
+            chat, user_message, route,
+            lambda ai_response: self._parse_ai_response(ai_response, trend, request, user_id, session_id),
+            system_message=prompt.system_message,
+            prompt_tokens=prompt.total_tokens,
+            # Opting out of reuse also means no replayed completion
+            fresh=not request.allow_similar
+        )
+        generated_content.promptTokens = prompt.total_tokens
+        
+        logger.info("Successfully generated content using OpenAI API (%s prompt tokens)", prompt.total_tokens)
+        return generated_content
+    
+    async def _generate_shared(
+        self,
+        trend: Trend,
+        request: ContentGenerationRequest,
+        user_id: str,
+        session_id: str,
+        owner: str = ""
+    ) -> GeneratedContent:
+        """Generate through the cross-worker cache so identical requests cost one LLM call.
+        
+        `owner` scopes the entry like the similarity cache's bucket does.
         """
+        
+        prompt_digest = hashlib.sha256((request.custom_prompt or "").strip().lower().encode("utf-8")).hexdigest()
+        key = f"generation:{trend.id}:{request.template_id}:{request.tone}:{owner}:{prompt_digest}"
+        computed = {}
+        
+        async def compute():
+            computed["content"] = await self._generate_with_llm(trend, request, user_id, session_id)
+            return computed["content"].dict()
+        
+        content_data = await shared_cache.get_or_compute(key, compute, GENERATION_CACHE_TTL_SECONDS)
+        if "content" in computed:
+            return computed["content"]
+        
+        # Computed by another worker (or an earlier request)
+        return self._reuse_generated_content(GeneratedContent(**content_data), request, user_id, session_id)
     
-    def _create_content_prompt(self, trend: Trend, request: ContentGenerationRequest) -> str:
-        """Create the user prompt for content generation"""
+    @traced("ai_service.pregenerate_content")
+    async def pregenerate_content(self, trend: Trend, template_id: str, tone: str) -> GeneratedContent:
+        """Fill the generation caches for a trend, template and tone ahead of demand.
+        
+        Unlike `generate_content_script` there is no demo or fallback content:
+        errors, including unparseable responses, propagate so nothing is cached
+        when the LLM is unavailable or misbehaves.
+        """
         
-        custom_instructions = f"\nAdditional instructions: {request.custom_prompt}" if request.custom_prompt else ""
+        request = ContentGenerationRequest(trend_id=trend.id, template_id=template_id, tone=tone)
+        session_id = f"pregen_{trend.id}_{template_id}"
+        generated_content = await self._generate_shared(trend, request, PREGENERATION_USER_ID, session_id)
+        self.similarity_cache.store(self._similarity_key(trend.id, template_id, tone, None, PREGENERATION_USER_ID), None, generated_content)
+        return generated_content
+    
+    @traced("ai_service.regenerate_part")
+    async def regenerate_part(self, session: ChatSession, request: SectionRegenerationRequest) -> GeneratedContent:
+        """Rewrite the title, hook or one outline section of a session's script.
         
-        prompt = f"""
-        Create a content script for the following trending topic:
+        Only the script skeleton, the targeted part and compacted session
+        history are sent, on the refinement route's small token budget. The
+        session's script and history are updated in place; errors propagate,
+        including SessionConflict when the session changed since it was read.
+        """
         
-        **Topic**: {trend.topic}
-        **Category**: {trend.category}
-        **Content Score**: {trend.contentScore}/100
-        **Trend Velocity**: {trend.trendVelocity}
-        **Primary Platform**: {trend.platform}
-        **Hashtags**: {', '.join(trend.hashtags)}
+        content = session.content
+        if request.target == "section":
+            if request.section_index is None or not 0 <= request.section_index < len(content.outline):
+                raise ValueError(f"section_index must be between 0 and {len(content.outline) - 1}")
         
-        **Key Insights**:
-        {chr(10).join(f"- {insight}" for insight in trend.keyInsights)}
+        prompt = build_refinement_prompt(
+            content, request.target, request.section_index, request.instructions,
+            summary=session.summary, history=session.messages
+        )
+        route = self.model_router.route("refine", content.template_id)
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=session.id,
+            system_message=prompt.system_message
+        ).with_model(route.provider, route.model).with_max_tokens(route.max_tokens)
         
-        **Suggested Angles**:
-        {chr(10).join(f"- {angle}" for angle in trend.suggestedAngles)}
+        part = await self._send_message(
+            chat, UserMessage(text=prompt.user_prompt), route,
+            lambda ai_response: self._parse_refinement(ai_response, request.target),
+            system_message=prompt.system_message,
+            prompt_tokens=prompt.total_tokens
+        )
         
-        **Platform Engagement Data**:
-        - Twitter: {trend.engagement.twitter.mentions} mentions, sentiment: {trend.engagement.twitter.sentiment}
-        - YouTube: {trend.engagement.youtube.videos} videos, {trend.engagement.youtube.totalViews} total views
-        - Reddit: {trend.engagement.reddit.upvotes} upvotes, {trend.engagement.reddit.comments} comments
+        if request.target == "section":
+            current = content.outline[request.section_index]
+            outline = list(content.outline)
+            outline[request.section_index] = ContentSection(
+                section=part["section"] or current.section,
+                duration=part["duration"] or current.duration,
+                content=part["content"]
+            )
+            update = {"outline": outline}
+            reply = "\n".join(part["content"])
+        else:
+            update = {request.target: part[request.target]}
+            reply = part[request.target]
+        session.content = GeneratedContent(**{**content.dict(), **update})
         
-        **Template**: {request.template_id}
-        **Tone**: {request.tone}
-        {custom_instructions}
+        turn = {"target": request.target, "section_index": request.section_index}
+        session_store.append(session, "user", request.instructions or "", **turn)
+        session_store.append(session, "assistant", reply, **turn)
+        await session_store.save(session)
         
-        Please generate a comprehensive content script in JSON format with the following structure:
-        {{
-            "title": "Compelling, clickable title",
-            "hook": "Attention-grabbing opening line",
-            "outline": [
-                {{
-                    "section": "Section name",
-                    "duration": "0:00 - 1:30",
-                    "content": ["Point 1", "Point 2", "Point 3"]
-                }}
-            ],
-            "keyPoints": ["Key point 1", "Key point 2", "Key point 3", "Key point 4"],
-            "seoKeywords": ["keyword1", "keyword2", "keyword3", "keyword4"],
-            "hashtags": ["#hashtag1", "#hashtag2", "#hashtag3"],
-            "estimatedViews": "10K - 25K",
-            "difficulty": "Beginner-friendly"
-        }}
+        logger.info("Regenerated %s of %s (%s prompt tokens)", request.target, content.id, prompt.total_tokens)
+        return session.content
+    
+    def _parse_refinement(self, ai_response: str, target: str) -> Dict[str, Any]:
+        """Extract the rewritten part from a refinement response.
+        
+        Raises InvalidResponseError for unusable output, keeping ValueError for bad requests.
+        """
+        
+        response_text = ai_response.strip()
+        if "```" in response_text:
+            start = response_text.find("{")
+            end = response_text.rfind("}") + 1
+            response_text = response_text[start:end]
+        try:
+            parsed = json.loads(response_text)
+        except ValueError as e:
+            raise InvalidResponseError(f"Refinement response is not valid JSON: {str(e)}") from e
+        
+        if target == "section":
+            if not isinstance(parsed.get("content"), list) or not parsed["content"]:
+                raise InvalidResponseError("Refinement response has no section content")
+            return {
+                "section": str(parsed.get("section") or ""),
+                "duration": str(parsed.get("duration") or ""),
+                "content": [str(point) for point in parsed["content"]]
+            }
+        if not parsed.get(target):
+            raise InvalidResponseError(f"Refinement response has no {target}")
+        return {target: str(parsed[target])}
+    
+    @traced("ai_service.llm_call")
+    async def _send_message(
+        self,
+        chat: LlmChat,
+        user_message: UserMessage,
+        route: Route,
+        parse: Callable[[str], T],
+        system_message: str = "",
+        prompt_tokens: int = None,
+        fresh: bool = False
+    ) -> T:
+        """Send a message to the LLM through the persistent response cache, recording metrics.
+        
+        Returns `parse(response)`. Only responses that parse and stayed under
+        the route's max_tokens are cached, so a malformed or truncated
+        completion is not replayed for later identical prompts. `fresh`
+        skips the cache read (outside replay mode) but still records the
+        new completion.
         """
         
-        return prompt
+        model, task = route.model, route.task
+        key = cache_key(model, system_message, user_message.text)
+        bypass = fresh and not self.response_cache.replay_mode
+        cached_response = None if bypass else await self.response_cache.get(key)
+        if cached_response is not None:
+            try:
+                result = parse(cached_response)
+            except Exception as e:
+                logger.warning("Ignoring unparseable cached %s response: %s", task, e)
+            else:
+                LLM_CACHE_REQUESTS.inc(task, "hit")
+                return result
+        
+        LLM_CACHE_REQUESTS.inc(task, "bypass" if bypass else "miss")
+        if self.response_cache.replay_mode:
+            raise ReplayMissError(f"No recorded {task} response in replay mode")
+        
+        start = time.perf_counter()
+        try:
+            response = await chat.send_message(user_message)
+        except Exception:
+            LLM_ERRORS.inc(model, task)
+            raise
+        finally:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - start, model, task)
+        
+        LLM_TOKENS.inc(model, "prompt", amount=prompt_tokens if prompt_tokens is not None else count_tokens(user_message.text))
+        completion_tokens = count_tokens(response)
+        LLM_TOKENS.inc(model, "completion", amount=completion_tokens)
+        self.model_router.observe(route, completion_tokens)
+        result = parse(response)
+        # A cut-off completion is not replayed: the next call gets the raised limit
+        if completion_tokens < route.max_tokens:
+            await self.response_cache.put(key, task, model, response)
+        return result
     
+    def _reuse_generated_content(
+        self,
+        cached_content: GeneratedContent,
+        request: ContentGenerationRequest,
+        user_id: str,
+        session_id: str
+    ) -> GeneratedContent:
+        """Copy a cached generation for a new request"""
+        
+        return GeneratedContent(**{
+            **cached_content.dict(exclude={"id", "created_at", "promptTokens"}),
+            "user_id": user_id,
+            "session_id": session_id,
+            "custom_prompt": request.custom_prompt,
+            "reusedFrom": cached_content.id
+        })
+    
+    @traced("ai_service.parse_response")
     def _parse_ai_response(
         self, 
         ai_response: str, 
@@ -160,11 +339,12 @@ class AIService:
         user_id: str,
         session_id: str
     ) -> GeneratedContent:
-        """Parse AI response and create GeneratedContent object"""
+        """Parse AI response and create GeneratedContent object.
+        
+        Raises InvalidResponseError when the response holds no usable script.
+        """
         
         try:
-            import json
-            
             # Try to extract JSON from AI response
             response_text = ai_response.strip()
             
@@ -176,7 +356,6 @@ class AIService:
             elif response_text.startswith("{"):
                 json_content = response_text
             else:
-                # If no JSON found, create a fallback structure
                 raise ValueError("No JSON structure found in AI response")
             
             # Parse JSON
@@ -192,7 +371,7 @@ class AIService:
                 ))
             
             # Create GeneratedContent object
-            generated_content = GeneratedContent(
+            return GeneratedContent(
                 user_id=user_id,
                 session_id=session_id,
                 trend_id=trend.id,
@@ -209,15 +388,8 @@ class AIService:
                 difficulty=parsed_data.get("difficulty", "Intermediate")
             )
             
-            return generated_content
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI response JSON: {str(e)}")
-            # Return fallback content
-            return self._create_fallback_content(trend, request, user_id, session_id)
         except Exception as e:
-            logger.error(f"Error parsing AI response: {str(e)}")
-            return self._create_fallback_content(trend, request, user_id, session_id)
+            raise InvalidResponseError(f"Unusable content response: {str(e)}") from e
     
     def _create_fallback_content(
         self, 
@@ -228,35 +400,7 @@ class AIService:
     ) -> GeneratedContent:
         """Create fallback content when AI parsing fails"""
         
-        fallback_outline = [
-            ContentSection(
-                section="Introduction",
-                duration="0:00 - 1:00",
-                content=[
-                    f"Introduce the topic: {trend.topic}",
-                    "Hook the audience with a compelling opening",
-                    "Preview what they'll learn"
-                ]
-            ),
-            ContentSection(
-                section="Main Content",
-                duration="1:00 - 8:00",
-                content=[
-                    "Deep dive into the topic",
-                    "Provide valuable insights and examples",
-                    "Address common questions and concerns"
-                ]
-            ),
-            ContentSection(
-                section="Conclusion & Call to Action",
-                duration="8:00 - 10:00",
-                content=[
-                    "Summarize key takeaways",
-                    "Provide actionable next steps",
-                    "Encourage engagement and subscriptions"
-                ]
-            )
-        ]
+        CONTENT_FALLBACKS.inc("fallback")
         
         return GeneratedContent(
             user_id=user_id,
@@ -265,21 +409,9 @@ class AIService:
             template_id=request.template_id,
             tone=request.tone,
             custom_prompt=request.custom_prompt,
-            title=f"Content Script: {trend.topic}",
-            hook=f"Did you know that {trend.topic} is trending right now? Here's what you need to know...",
-            outline=fallback_outline,
-            keyPoints=[
-                f"{trend.topic} is gaining significant traction",
-                "Understanding this trend can benefit your audience",
-                "There are specific strategies to leverage this topic",
-                "Timing is crucial for maximum impact"
-            ],
-            seoKeywords=trend.hashtags[:4] if len(trend.hashtags) >= 4 else trend.hashtags + ["trending", "content"],
-            hashtags=trend.hashtags[:5],
-            estimatedViews="2K - 8K",
-            difficulty="Beginner-friendly"
+            **demo_content.render_fallback(trend)
         )
-
+    
     def _create_enhanced_demo_content(
         self, 
         trend: Trend, 
@@ -289,190 +421,9 @@ class AIService:
     ) -> GeneratedContent:
         """Create enhanced demo content based on trend and template"""
         
-        # Template-specific content generation
-        template_content = {
-            "youtube-explainer": {
-                "title": f"{trend.topic}: The Complete Guide for 2025",
-                "hook": f"What if I told you that {trend.topic.lower()} could transform your entire approach to content creation in the next 10 minutes?",
-                "outline": [
-                    {
-                        "section": "Hook & Problem Setup",
-                        "duration": "0:00 - 1:30",
-                        "content": [
-                            f"Start with compelling statistic about {trend.topic}",
-                            "Share a personal story or common pain point",
-                            "Promise specific value and transformation"
-                        ]
-                    },
-                    {
-                        "section": "Understanding the Trend",
-                        "duration": "1:30 - 4:00",
-                        "content": [
-                            f"What exactly is {trend.topic} and why it matters",
-                            "Current market landscape and opportunities",
-                            "Common misconceptions debunked"
-                        ]
-                    },
-                    {
-                        "section": "Practical Implementation",
-                        "duration": "4:00 - 10:00",
-                        "content": [
-                            "Step-by-step process breakdown",
-                            "Real-world examples and case studies",
-                            "Tools and resources needed"
-                        ]
-                    },
-                    {
-                        "section": "Results & Next Steps",
-                        "duration": "10:00 - 12:00",
-                        "content": [
-                            "Expected outcomes and timeline",
-                            "Common pitfalls to avoid",
-                            "Action items for viewers"
-                        ]
-                    }
-                ],
-                "estimatedViews": "25K - 75K",
-                "difficulty": "Beginner-friendly"
-            },
-            "blog-post": {
-                "title": f"The Ultimate Guide to {trend.topic}: Everything You Need to Know in 2025",
-                "hook": f"In the rapidly evolving landscape of digital content, {trend.topic.lower()} has emerged as a game-changing trend that's reshaping how creators approach their craft.",
-                "outline": [
-                    {
-                        "section": "Introduction",
-                        "duration": "Opening",
-                        "content": [
-                            f"Define {trend.topic} and its significance",
-                            "Why this trend matters now",
-                            "What readers will learn"
-                        ]
-                    },
-                    {
-                        "section": "Deep Dive Analysis",
-                        "duration": "Main Content",
-                        "content": [
-                            "Historical context and evolution",
-                            "Current market dynamics",
-                            "Key players and innovations"
-                        ]
-                    },
-                    {
-                        "section": "Practical Applications",
-                        "duration": "Implementation",
-                        "content": [
-                            "How to get started",
-                            "Best practices and strategies",
-                            "Real-world success stories"
-                        ]
-                    },
-                    {
-                        "section": "Future Outlook",
-                        "duration": "Conclusion",
-                        "content": [
-                            "Predictions and trends",
-                            "Opportunities ahead",
-                            "Final recommendations"
-                        ]
-                    }
-                ],
-                "estimatedViews": "15K - 40K",
-                "difficulty": "Intermediate"
-            },
-            "social-thread": {
-                "title": f"🚀 {trend.topic}: The Thread You've Been Waiting For",
-                "hook": f"Everyone's talking about {trend.topic.lower()}, but here's what they're not telling you... 🧵",
-                "outline": [
-                    {
-                        "section": "Hook Tweet",
-                        "duration": "Tweet 1",
-                        "content": [
-                            f"Attention-grabbing statement about {trend.topic}",
-                            "Promise of valuable insights",
-                            "Thread emoji to indicate continuation"
-                        ]
-                    },
-                    {
-                        "section": "Problem/Opportunity",
-                        "duration": "Tweets 2-3",
-                        "content": [
-                            "Identify the challenge or opportunity",
-                            "Share relevant statistics or data",
-                            "Connect with audience pain points"
-                        ]
-                    },
-                    {
-                        "section": "Solution/Insights",
-                        "duration": "Tweets 4-8",
-                        "content": [
-                            "Break down key insights",
-                            "Share actionable tips",
-                            "Include relevant examples"
-                        ]
-                    },
-                    {
-                        "section": "Call to Action",
-                        "duration": "Final Tweet",
-                        "content": [
-                            "Summarize key takeaways",
-                            "Ask for engagement (retweets, likes)",
-                            "Promote related content or services"
-                        ]
-                    }
-                ],
-                "estimatedViews": "50K - 200K",
-                "difficulty": "Beginner-friendly"
-            }
-        }
-        
-        # Get template-specific content or use default
-        content_data = template_content.get(request.template_id, template_content["youtube-explainer"])
-        
-        # Adjust content based on tone
-        tone_adjustments = {
-            "professional": "authoritative and data-driven",
-            "casual": "friendly and conversational",
-            "humorous": "entertaining with appropriate humor",
-            "educational": "teaching-focused with clear explanations",
-            "controversial": "provocative yet respectful",
-            "inspirational": "motivational and uplifting"
-        }
-        
-        # Generate key points based on trend insights
-        key_points = [
-            f"{trend.topic} is gaining significant momentum across platforms",
-            f"Early adopters are seeing {['substantial growth', 'impressive results', 'competitive advantages'][hash(trend.id) % 3]}",
-            f"The trend aligns perfectly with current market demands",
-            f"Implementation requires {['strategic planning', 'creative thinking', 'technical expertise'][hash(trend.id) % 3]}"
-        ]
-        
-        # Add custom insights if available
-        if trend.keyInsights and trend.keyInsights[0] != "Analysis unavailable":
-            key_points = trend.keyInsights[:4]
-        
-        # Generate SEO keywords
-        seo_keywords = [
-            trend.topic.lower().replace(" ", " "),
-            f"{trend.topic.lower()} 2025",
-            f"{trend.topic.lower()} guide",
-            f"{trend.topic.lower()} strategy"
-        ]
-        
-        # Add category-specific keywords
-        if trend.category.lower() == "technology":
-            seo_keywords.extend(["tech trends", "innovation", "digital transformation"])
-        elif trend.category.lower() == "business":
-            seo_keywords.extend(["business strategy", "growth", "entrepreneurship"])
-        
-        # Convert outline to ContentSection objects
-        outline_sections = []
-        for section in content_data["outline"]:
-            outline_sections.append(ContentSection(
-                section=section["section"],
-                duration=section["duration"],
-                content=section["content"]
-            ))
+        CONTENT_FALLBACKS.inc("demo")
         
+        # Rendered from templates compiled at import, so outages stay cheap to serve
         return GeneratedContent(
             user_id=user_id,
             session_id=session_id,
@@ -480,64 +431,46 @@ class AIService:
             template_id=request.template_id,
             tone=request.tone,
             custom_prompt=request.custom_prompt,
-            title=content_data["title"],
-            hook=content_data["hook"],
-            outline=outline_sections,
-            keyPoints=key_points,
-            seoKeywords=seo_keywords[:6],
-            hashtags=trend.hashtags[:5] if trend.hashtags else [f"#{trend.topic.replace(' ', '')}", "#ContentCreation", "#2025Trends"],
-            estimatedViews=content_data["estimatedViews"],
-            difficulty=content_data["difficulty"]
+            **demo_content.render_demo(trend, request.template_id)
         )
 
-    async def analyze_trend_potential(self, topic: str, platform_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze trend potential using AI"""
+    @traced("ai_service.generate_trend_insights")
+    async def generate_trend_insights(self, topic: str, platform_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate key insights and suggested angles for a trend.
         
-        try:
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"trend_analysis_{topic}",
-                system_message="You are a trend analysis expert. Analyze social media trends and provide content potential scores with insights."
-            ).with_model("openai", "gpt-4o").with_max_tokens(2048)
-            
-            prompt = f"""
-            Analyze this trending topic for content creation potential:
-            
-            Topic: {topic}
-            Platform Data: {platform_data}
-            
-            Provide analysis in JSON format:
-            {{
-                "contentScore": 85,
-                "trendVelocity": "Rising Fast",
-                "keyInsights": ["insight1", "insight2", "insight3"],
-                "suggestedAngles": ["angle1", "angle2", "angle3"],
-                "category": "Technology"
-            }}
-            """
-            
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
-            
-            # Parse response
-            import json
-            try:
-                return json.loads(response)
-            except:
-                return {
-                    "contentScore": 75,
-                    "trendVelocity": "Steady Growth",
-                    "keyInsights": ["Trending topic with potential", "Audience engagement expected", "Timing is important"],
-                    "suggestedAngles": ["Educational approach", "Personal experience", "Industry analysis"],
-                    "category": "General"
-                }
-                
-        except Exception as e:
-            logger.error(f"Error analyzing trend: {str(e)}")
-            return {
-                "contentScore": 70,
-                "trendVelocity": "Unknown",
-                "keyInsights": ["Analysis unavailable"],
-                "suggestedAngles": ["General coverage"],
-                "category": "General"
-            }
\ No newline at end of file
+        Scores and velocity come from the local scoring model; only the
+        qualitative fields need the LLM. Errors propagate so callers can fall
+        back to template insights.
+        """
+        
+        system_message = "You are a trend analysis expert. Explain why social media trends matter and how creators can cover them."
+        route = self.model_router.route("analysis")
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"trend_analysis_{topic}",
+            system_message=system_message
+        ).with_model(route.provider, route.model).with_max_tokens(route.max_tokens)
+        
+        prompt = f"""
+        Analyze this trending topic for content creation potential:
+        
+        Topic: {topic}
+        Platform Data: {platform_data}
+        
+        Provide analysis in JSON format:
+        {{
+            "keyInsights": ["insight1", "insight2", "insight3"],
+            "suggestedAngles": ["angle1", "angle2", "angle3"]
+        }}
+        """
+        
+        user_message = UserMessage(text=prompt)
+        return await self._send_message(chat, user_message, route, self._parse_insights, system_message=system_message)
+    
+    def _parse_insights(self, response: str) -> Dict[str, Any]:
+        """Extract insights and angles from an analysis response"""
+        analysis = json.loads(response)
+        return {
+            "keyInsights": list(analysis.get("keyInsights") or []),
+            "suggestedAngles": list(analysis.get("suggestedAngles") or [])
+        }
\ No newline at end of file
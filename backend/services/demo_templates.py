@@ -0,0 +1,322 @@
+import zlib
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Callable, Dict, List, Tuple
+from models import Trend, ContentSection
+from .prompt_builder import DEFAULT_TEMPLATE_ID, TEMPLATE_INSTRUCTIONS
+
+# Values available to demo template strings
+PLACEHOLDERS = {"topic", "topic_lower", "category", "momentum", "requirement"}
+
+MOMENTUM_PHRASES = ["substantial growth", "impressive results", "competitive advantages"]
+REQUIREMENT_PHRASES = ["strategic planning", "creative thinking", "technical expertise"]
+
+# Demo scripts served when the LLM is unavailable. Strings use str.format
+# placeholders from PLACEHOLDERS; outlines are (section, duration, points).
+DEMO_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "youtube-explainer": {
+        "title": "{topic}: The Complete Guide for 2025",
+        "hook": "What if I told you that {topic_lower} could transform your entire approach to content creation in the next 10 minutes?",
+        "outline": [
+            ("Hook & Problem Setup", "0:00 - 1:30", [
+                "Start with compelling statistic about {topic}",
+                "Share a personal story or common pain point",
+                "Promise specific value and transformation"
+            ]),
+            ("Understanding the Trend", "1:30 - 4:00", [
+                "What exactly is {topic} and why it matters",
+                "Current market landscape and opportunities",
+                "Common misconceptions debunked"
+            ]),
+            ("Practical Implementation", "4:00 - 10:00", [
+                "Step-by-step process breakdown",
+                "Real-world examples and case studies",
+                "Tools and resources needed"
+            ]),
+            ("Results & Next Steps", "10:00 - 12:00", [
+                "Expected outcomes and timeline",
+                "Common pitfalls to avoid",
+                "Action items for viewers"
+            ])
+        ],
+        "estimatedViews": "25K - 75K",
+        "difficulty": "Beginner-friendly"
+    },
+    "blog-post": {
+        "title": "The Ultimate Guide to {topic}: Everything You Need to Know in 2025",
+        "hook": "In the rapidly evolving landscape of digital content, {topic_lower} has emerged as a game-changing trend that's reshaping how creators approach their craft.",
+        "outline": [
+            ("Introduction", "Opening", [
+                "Define {topic} and its significance",
+                "Why this trend matters now",
+                "What readers will learn"
+            ]),
+            ("Deep Dive Analysis", "Main Content", [
+                "Historical context and evolution",
+                "Current market dynamics",
+                "Key players and innovations"
+            ]),
+            ("Practical Applications", "Implementation", [
+                "How to get started",
+                "Best practices and strategies",
+                "Real-world success stories"
+            ]),
+            ("Future Outlook", "Conclusion", [
+                "Predictions and trends",
+                "Opportunities ahead",
+                "Final recommendations"
+            ])
+        ],
+        "estimatedViews": "15K - 40K",
+        "difficulty": "Intermediate"
+    },
+    "social-thread": {
+        "title": "🚀 {topic}: The Thread You've Been Waiting For",
+        "hook": "Everyone's talking about {topic_lower}, but here's what they're not telling you... 🧵",
+        "outline": [
+            ("Hook Tweet", "Tweet 1", [
+                "Attention-grabbing statement about {topic}",
+                "Promise of valuable insights",
+                "Thread emoji to indicate continuation"
+            ]),
+            ("Problem/Opportunity", "Tweets 2-3", [
+                "Identify the challenge or opportunity",
+                "Share relevant statistics or data",
+                "Connect with audience pain points"
+            ]),
+            ("Solution/Insights", "Tweets 4-8", [
+                "Break down key insights",
+                "Share actionable tips",
+                "Include relevant examples"
+            ]),
+            ("Call to Action", "Final Tweet", [
+                "Summarize key takeaways",
+                "Ask for engagement (retweets, likes)",
+                "Promote related content or services"
+            ])
+        ],
+        "estimatedViews": "50K - 200K",
+        "difficulty": "Beginner-friendly"
+    },
+    "podcast-guide": {
+        "title": "{topic}: What Everyone's Missing (Episode Guide)",
+        "hook": "Today we're unpacking {topic_lower} - why it's suddenly everywhere, who's actually benefiting, and what it means for you.",
+        "outline": [
+            ("Cold Open & Intro", "0:00 - 3:00", [
+                "Tease the most surprising angle on {topic}",
+                "Introduce hosts and guest",
+                "Set up the episode's central question"
+            ]),
+            ("Background & Context", "3:00 - 12:00", [
+                "How {topic} got here and why it's trending now",
+                "Guest's first-hand experience with the trend",
+                "Key numbers to anchor the conversation"
+            ]),
+            ("Deep Discussion", "12:00 - 30:00", [
+                "Where hosts and guest disagree",
+                "Listener questions and common misconceptions",
+                "Practical takeaways for the audience"
+            ]),
+            ("Rapid Fire & Wrap-Up", "30:00 - 35:00", [
+                "Quick predictions for the next 12 months",
+                "One recommendation each",
+                "Where to follow the guest and next episode teaser"
+            ])
+        ],
+        "estimatedViews": "5K - 20K",
+        "difficulty": "Intermediate"
+    },
+    "short-form": {
+        "title": "{topic} in 30 Seconds",
+        "hook": "Stop scrolling - {topic_lower} is about to change everything. Here's why.",
+        "outline": [
+            ("Hook", "0:00 - 0:03", [
+                "Bold on-screen claim about {topic}",
+                "Pattern-interrupt visual or sound",
+                "Face to camera, no intro"
+            ]),
+            ("Payoff", "0:03 - 0:20", [
+                "Three fast facts with text overlays",
+                "One concrete example or demo",
+                "Quick cuts every 2-3 seconds"
+            ]),
+            ("Loop & Call to Action", "0:20 - 0:30", [
+                "Punchline that loops back to the hook",
+                "Ask viewers to follow for part 2",
+                "Pin a comment question to drive replies"
+            ])
+        ],
+        "estimatedViews": "100K - 500K",
+        "difficulty": "Beginner-friendly"
+    },
+}
+
+DEMO_KEY_POINTS = [
+    "{topic} is gaining significant momentum across platforms",
+    "Early adopters are seeing {momentum}",
+    "The trend aligns perfectly with current market demands",
+    "Implementation requires {requirement}",
+]
+
+DEMO_SEO_KEYWORDS = [
+    "{topic_lower}",
+    "{topic_lower} 2025",
+    "{topic_lower} guide",
+    "{topic_lower} strategy",
+]
+
+CATEGORY_SEO_KEYWORDS = {
+    "technology": ["tech trends", "innovation", "digital transformation"],
+    "business": ["business strategy", "growth", "entrepreneurship"],
+}
+
+# Served when the LLM responded but its output could not be used
+FALLBACK_TEMPLATE: Dict[str, Any] = {
+    "title": "Content Script: {topic}",
+    "hook": "Did you know that {topic} is trending right now? Here's what you need to know...",
+    "outline": [
+        ("Introduction", "0:00 - 1:00", [
+            "Introduce the topic: {topic}",
+            "Hook the audience with a compelling opening",
+            "Preview what they'll learn"
+        ]),
+        ("Main Content", "1:00 - 8:00", [
+            "Deep dive into the topic",
+            "Provide valuable insights and examples",
+            "Address common questions and concerns"
+        ]),
+        ("Conclusion & Call to Action", "8:00 - 10:00", [
+            "Summarize key takeaways",
+            "Provide actionable next steps",
+            "Encourage engagement and subscriptions"
+        ])
+    ],
+    "estimatedViews": "2K - 8K",
+    "difficulty": "Beginner-friendly"
+}
+
+FALLBACK_KEY_POINTS = [
+    "{topic} is gaining significant traction",
+    "Understanding this trend can benefit your audience",
+    "There are specific strategies to leverage this topic",
+    "Timing is crucial for maximum impact",
+]
+
+Renderer = Callable[[Dict[str, str]], str]
+
+
+def _compile_text(text: str) -> Renderer:
+    """Validate placeholders once; static strings render without formatting"""
+    fields = {name for _, name, _, _ in Formatter().parse(text) if name is not None}
+    unknown = fields - PLACEHOLDERS
+    if unknown:
+        raise ValueError(f"Unknown demo template placeholders {sorted(unknown)} in {text!r}")
+    if not fields:
+        return lambda values: text
+    return text.format_map
+
+
+def _compile_list(texts: List[str]) -> Tuple[Renderer, ...]:
+    return tuple(_compile_text(text) for text in texts)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    title: Renderer
+    hook: Renderer
+    outline: Tuple[Tuple[str, str, Tuple[Renderer, ...]], ...]
+    estimated_views: str
+    difficulty: str
+
+    @classmethod
+    def compile(cls, spec: Dict[str, Any]) -> "CompiledTemplate":
+        return cls(
+            title=_compile_text(spec["title"]),
+            hook=_compile_text(spec["hook"]),
+            outline=tuple(
+                (section, duration, _compile_list(points)) for section, duration, points in spec["outline"]
+            ),
+            estimated_views=spec["estimatedViews"],
+            difficulty=spec["difficulty"]
+        )
+
+    def render(self, values: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "title": self.title(values),
+            "hook": self.hook(values),
+            "outline": [
+                ContentSection(section=section, duration=duration, content=[point(values) for point in points])
+                for section, duration, points in self.outline
+            ],
+            "estimatedViews": self.estimated_views,
+            "difficulty": self.difficulty
+        }
+
+
+def _render_list(renderers: Tuple[Renderer, ...], values: Dict[str, str]) -> List[str]:
+    return [render(values) for render in renderers]
+
+
+def _trend_values(trend: Trend) -> Dict[str, str]:
+    # crc32 rather than hash() so every worker picks the same phrases for a trend
+    variant = zlib.crc32(trend.id.encode("utf-8"))
+    return {
+        "topic": trend.topic,
+        "topic_lower": trend.topic.lower(),
+        "category": trend.category,
+        "momentum": MOMENTUM_PHRASES[variant % len(MOMENTUM_PHRASES)],
+        "requirement": REQUIREMENT_PHRASES[variant % len(REQUIREMENT_PHRASES)],
+    }
+
+
+class DemoContentRegistry:
+    """Demo and fallback scripts compiled once and rendered by substitution.
+
+    Covers every content template; unknown template IDs get the default
+    template's script.
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]] = DEMO_TEMPLATES, fallback: Dict[str, Any] = FALLBACK_TEMPLATE):
+        missing = set(TEMPLATE_INSTRUCTIONS) - set(templates)
+        if missing:
+            raise ValueError(f"No demo content for templates: {', '.join(sorted(missing))}")
+        self.templates = {template_id: CompiledTemplate.compile(spec) for template_id, spec in templates.items()}
+        self.fallback = CompiledTemplate.compile(fallback)
+        self.demo_key_points = _compile_list(DEMO_KEY_POINTS)
+        self.seo_keywords = _compile_list(DEMO_SEO_KEYWORDS)
+        self.fallback_key_points = _compile_list(FALLBACK_KEY_POINTS)
+
+    def render_demo(self, trend: Trend, template_id: str) -> Dict[str, Any]:
+        """Content fields of a demo script for a trend"""
+        template = self.templates.get(template_id) or self.templates[DEFAULT_TEMPLATE_ID]
+        values = _trend_values(trend)
+        content = template.render(values)
+
+        # Prefer the trend's own insights when it has them
+        if trend.keyInsights and trend.keyInsights[0] != "Analysis unavailable":
+            content["keyPoints"] = trend.keyInsights[:4]
+        else:
+            content["keyPoints"] = _render_list(self.demo_key_points, values)
+
+        seo_keywords = _render_list(self.seo_keywords, values)
+        seo_keywords.extend(CATEGORY_SEO_KEYWORDS.get(trend.category.lower(), []))
+        content["seoKeywords"] = seo_keywords[:6]
+        content["hashtags"] = (
+            trend.hashtags[:5] if trend.hashtags
+            else [f"#{trend.topic.replace(' ', '')}", "#ContentCreation", "#2025Trends"]
+        )
+        return content
+
+    def render_fallback(self, trend: Trend) -> Dict[str, Any]:
+        """Content fields of the generic fallback script for a trend"""
+        values = _trend_values(trend)
+        content = self.fallback.render(values)
+        content["keyPoints"] = _render_list(self.fallback_key_points, values)
+        content["seoKeywords"] = (
+            trend.hashtags[:4] if len(trend.hashtags) >= 4 else trend.hashtags + ["trending", "content"]
+        )
+        content["hashtags"] = trend.hashtags[:5]
+        return content
+
+
+demo_content = DemoContentRegistry()
@@ -0,0 +1,90 @@
+import re
+import logging
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keyword rules: each entry maps a group of keywords (single words or phrases)
+# to the hashtags added when any of them appears in a topic as whole words.
+# Order matters - hashtags are emitted in rule order.
+HASHTAG_RULES: List[Tuple[Sequence[str], Sequence[str]]] = [
+    (("ai", "artificial intelligence"), ("#AI", "#ArtificialIntelligence", "#MachineLearning")),
+    (("business", "startup", "startups", "saas"), ("#Business", "#Startup", "#Entrepreneurship")),
+    (("tech", "code", "coding", "programming"), ("#Tech", "#Programming", "#Development")),
+    (("health", "wellness"), ("#Health", "#Wellness", "#MentalHealth")),
+    (("remote", "work"), ("#RemoteWork", "#Productivity", "#WorkFromHome")),
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens (hyphens and punctuation are separators)"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class HashtagMatcher:
+    """Word-boundary keyword matcher compiled once from a rule table.
+
+    Keywords are tokenized and stored in a phrase -> rule index table, so
+    matching a topic costs one dict lookup per (token, phrase length) pair
+    regardless of how many rules are registered.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[Sequence[str], Sequence[str]]] = HASHTAG_RULES):
+        self._hashtags: List[Tuple[str, ...]] = []
+        self._phrases: Dict[Tuple[str, ...], List[int]] = {}
+        self._max_phrase_len = 1
+
+        for rule_index, (keywords, hashtags) in enumerate(rules):
+            self._hashtags.append(tuple(hashtags))
+            for keyword in keywords:
+                phrase = tuple(_tokenize(keyword))
+                if not phrase:
+                    continue
+                self._phrases.setdefault(phrase, []).append(rule_index)
+                self._max_phrase_len = max(self._max_phrase_len, len(phrase))
+
+        logger.debug("Compiled hashtag matcher with %s rules", len(self._hashtags))
+
+    def match_rules(self, tokens: Sequence[str]) -> List[int]:
+        """Return the indexes of all rules matched by the token sequence, in rule order"""
+
+        matched = set()
+        token_count = len(tokens)
+
+        for start in range(token_count):
+            for length in range(1, min(self._max_phrase_len, token_count - start) + 1):
+                rule_indexes = self._phrases.get(tuple(tokens[start:start + length]))
+                if rule_indexes:
+                    matched.update(rule_indexes)
+
+        return sorted(matched)
+
+    def generate(self, topic: str, limit: int = 5) -> List[str]:
+        """Generate hashtags for a single topic"""
+
+        tokens = _tokenize(topic)
+
+        # Topic-specific hashtags from the longer words of the topic
+        hashtags = [f"#{word.capitalize()}" for word in tokens if len(word) > 3]
+
+        # Rule-based trending hashtags
+        for rule_index in self.match_rules(tokens):
+            hashtags.extend(self._hashtags[rule_index])
+
+        # Remove duplicates and limit
+        return list(dict.fromkeys(hashtags))[:limit]
+
+    def generate_batch(self, topics: Iterable[str], limit: int = 5) -> Dict[str, List[str]]:
+        """Generate hashtags for many topics at once, keyed by topic"""
+
+        results: Dict[str, List[str]] = {}
+        for topic in topics:
+            if topic not in results:
+                results[topic] = self.generate(topic, limit=limit)
+        return results
+
+
+# Shared matcher instance compiled at import time
+hashtag_matcher = HashtagMatcher()
@@ -0,0 +1,147 @@
+import os
+import time
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from metrics import Counter
+from .shared_cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+# How long a completed result is replayed for a repeated key
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_MAX_LOCAL_RESULTS = int(os.environ.get("IDEMPOTENCY_MAX_LOCAL_RESULTS", "1000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key by outcome", ("outcome",)
+)
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request"""
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Runs a request at most once per idempotency key and replays its result.
+
+    A repeated key attaches to the in-flight computation or returns the stored
+    result. Computations run as tasks detached from the request, so a client
+    that times out and retries finds its first attempt still running instead
+    of cancelled. Results live in a bounded local LRU and, through the shared
+    cache, in Mongo (TTL-indexed) for retries landing on another worker; the
+    shared cache's lease also lets concurrent retries on different workers
+    wait for one computation. Failed computations are not stored, so a retry
+    after an error runs again.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_local_results: int = IDEMPOTENCY_MAX_LOCAL_RESULTS
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_local_results = max_local_results
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._results: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _key(scope: str, key: str) -> str:
+        return f"idempotency:{scope}:{key}"
+
+    def _local_result(self, full_key: str) -> Optional[Tuple[str, Any]]:
+        entry = self._results.get(full_key)
+        if entry is None:
+            return None
+        expires_at, fingerprint, value = entry
+        if time.monotonic() >= expires_at:
+            del self._results[full_key]
+            return None
+        self._results.move_to_end(full_key)
+        return fingerprint, value
+
+    def _remember(self, full_key: str, fingerprint: str, value: Any):
+        self._results[full_key] = (time.monotonic() + self.ttl_seconds, fingerprint, value)
+        self._results.move_to_end(full_key)
+        while len(self._results) > self.max_local_results:
+            self._results.popitem(last=False)
+
+    def is_known(self, scope: str, key: str) -> bool:
+        """Whether this worker is running or holds the result for a key"""
+        full_key = self._key(scope, key)
+        return full_key in self._in_flight or self._local_result(full_key) is not None
+
+    async def _execute(self, full_key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        computed = False
+
+        async def compute_record():
+            nonlocal computed
+            computed = True
+            IDEMPOTENT_REQUESTS.inc("new")
+            return {"fingerprint": fingerprint, "value": await compute()}
+
+        record = await shared_cache.get_or_compute(full_key, compute_record, self.ttl_seconds)
+        if record["fingerprint"] != fingerprint:
+            IDEMPOTENT_REQUESTS.inc("conflict")
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        self._remember(full_key, fingerprint, record["value"])
+        # Stored (or being computed) by another worker
+        if not computed:
+            IDEMPOTENT_REQUESTS.inc("replayed")
+        return record["value"], not computed
+
+    def _finished(self, full_key: str, task: asyncio.Task):
+        self._in_flight.pop(full_key, None)
+        # Retrieve errors of computations whose clients went away
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Idempotent computation for %s failed: %s", full_key, task.exception())
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Result for a key, computing it only once; returns (value, replayed).
+
+        `compute` must return a BSON-serializable value. Raises ValueError
+        for an invalid key and IdempotencyConflict when the key was used
+        with a different fingerprint.
+        """
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ValueError(f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+        full_key = self._key(scope, key)
+
+        stored = self._local_result(full_key)
+        if stored is not None:
+            if stored[0] != fingerprint:
+                IDEMPOTENT_REQUESTS.inc("conflict")
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+            IDEMPOTENT_REQUESTS.inc("replayed")
+            return stored[1], True
+
+        in_flight = self._in_flight.get(full_key)
+        if in_flight is not None:
+            if in_flight[0] != fingerprint:
+                IDEMPOTENT_REQUESTS.inc("conflict")
+                raise IdempotencyConflict("Idempotency-Key is in use for a different request")
+            IDEMPOTENT_REQUESTS.inc("attached")
+            value, _ = await asyncio.shield(in_flight[1])
+            return value, True
+
+        task = asyncio.create_task(self._execute(full_key, fingerprint, compute))
+        self._in_flight[full_key] = (fingerprint, task)
+        task.add_done_callback(lambda done: self._finished(full_key, done))
+        # Shielded: the computation outlives a client that disconnects
+        return await asyncio.shield(task)
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,139 @@
+import os
+import time
+import json
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "cache" / "llm_cache.sqlite3"
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "20000"))
+# Replay mode serves only recorded responses and never calls the LLM
+LLM_REPLAY_MODE = os.environ.get("LLM_REPLAY_MODE", "false").lower() == "true"
+
+# Expired rows are purged every this many writes
+_PURGE_EVERY = 200
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when no recorded response exists for a request"""
+
+
+def cache_key(model: str, system_message: str, prompt: str) -> str:
+    """Content address of an LLM request"""
+    payload = json.dumps([model, system_message, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """Persistent SQLite cache of raw LLM responses with TTL and size-based eviction.
+
+    Lookups refresh `accessed_at`, so when the cache is over `max_entries` the
+    least recently used rows are evicted first.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+        replay_mode: bool = LLM_REPLAY_MODE
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled or replay_mode
+        self.replay_mode = replay_mode
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY, task TEXT NOT NULL, model TEXT NOT NULL, response TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            # Recorded responses never expire while replaying
+            if not self.replay_mode and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return response
+
+    def _put(self, key: str, task: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, task, model, response, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, task, model, response, now, now)
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM llm_responses WHERE key IN"
+                " (SELECT key FROM llm_responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            logger.info("Evicted %s LLM cache entries", overflow)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logger.error("Error reading LLM cache: %s", e)
+            return None
+
+    async def put(self, key: str, task: str, model: str, response: str):
+        """Store a response; failures are logged and otherwise ignored"""
+        if not self.enabled or self.replay_mode:
+            return
+        try:
+            await asyncio.to_thread(self._put, key, task, model, response)
+        except sqlite3.Error as e:
+            logger.error("Error writing LLM cache: %s", e)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
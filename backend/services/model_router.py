@@ -0,0 +1,146 @@
+import os
+import math
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+from metrics import Counter
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Model tiers as (provider, model); override the model names per deployment
+MODEL_TIERS: Dict[str, Tuple[str, str]] = {
+    "fast": ("openai", os.environ.get("LLM_FAST_MODEL", "gpt-4o-mini")),
+    "standard": ("openai", os.environ.get("LLM_STANDARD_MODEL", "gpt-4o")),
+}
+
+ADAPTIVE_MAX_TOKENS = os.environ.get("LLM_ADAPTIVE_MAX_TOKENS", "true").lower() == "true"
+# Observed completions needed before a route's limit adapts
+ADAPTIVE_MIN_SAMPLES = int(os.environ.get("LLM_ADAPTIVE_MIN_SAMPLES", "20"))
+ADAPTIVE_WINDOW = 200
+ADAPTIVE_PERCENTILE = 95
+# Headroom over the observed percentile
+ADAPTIVE_HEADROOM = 1.25
+
+LLM_ROUTING_DECISIONS = Counter(
+    "llm_routing_decisions_total", "LLM routing decisions by task, template and model", ("task", "template", "model")
+)
+LLM_TRUNCATIONS = Counter("llm_truncations_total", "Completions that hit their max_tokens limit", ("task", "template"))
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Tier and token limits for a task (and optionally a template).
+
+    `max_tokens` is the ceiling; adaptive limits never go below `min_tokens`.
+    """
+    tier: str
+    max_tokens: int
+    min_tokens: int
+
+
+# Keyed by (task, template); a template of None is the task default
+ROUTING_TABLE: Dict[Tuple[str, Optional[str]], RoutePolicy] = {
+    ("analysis", None): RoutePolicy("fast", 512, 256),
+    ("refine", None): RoutePolicy("fast", 768, 192),
+    ("content", None): RoutePolicy("standard", 4096, 1024),
+    ("content", "youtube-explainer"): RoutePolicy("standard", 4096, 1536),
+    ("content", "blog-post"): RoutePolicy("standard", 4096, 1536),
+    ("content", "podcast-guide"): RoutePolicy("standard", 3072, 1024),
+    ("content", "social-thread"): RoutePolicy("fast", 1536, 768),
+    ("content", "short-form"): RoutePolicy("fast", 1024, 512),
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    task: str
+    template: str
+    provider: str
+    model: str
+    max_tokens: int
+
+
+class ModelRouter:
+    """Routes LLM calls to a model tier and max_tokens per task and template.
+
+    Each route keeps a window of observed completion sizes; once it has
+    enough samples the limit becomes the observed percentile plus headroom,
+    clamped to the policy's [min_tokens, max_tokens]. A completion that hits
+    its limit is recorded as truncated and counts as twice its size, so the
+    limit grows back quickly.
+    """
+
+    def __init__(
+        self,
+        table: Optional[Dict[Tuple[str, Optional[str]], RoutePolicy]] = None,
+        tiers: Optional[Dict[str, Tuple[str, str]]] = None,
+        adaptive: bool = ADAPTIVE_MAX_TOKENS,
+        min_samples: int = ADAPTIVE_MIN_SAMPLES
+    ):
+        self.table = dict(ROUTING_TABLE if table is None else table)
+        self.tiers = dict(MODEL_TIERS if tiers is None else tiers)
+        self.adaptive = adaptive
+        self.min_samples = min_samples
+        self._observed: Dict[Tuple[str, str], Deque[int]] = {}
+
+    def _resolve(self, task: str, template: Optional[str]) -> Tuple[str, RoutePolicy]:
+        """The matched template label ("-" for the task default) and its policy"""
+        policy = self.table.get((task, template))
+        if policy is not None and template is not None:
+            return template, policy
+        policy = self.table.get((task, None))
+        if policy is None:
+            raise ValueError(f"No LLM route for task {task!r}")
+        return "-", policy
+
+    def _adaptive_limit(self, key: Tuple[str, str], policy: RoutePolicy) -> int:
+        samples = self._observed.get(key)
+        if not self.adaptive or not samples or len(samples) < self.min_samples:
+            return policy.max_tokens
+        ordered = sorted(samples)
+        observed = ordered[min(len(ordered) - 1, math.ceil(ADAPTIVE_PERCENTILE / 100 * len(ordered)) - 1)]
+        return max(policy.min_tokens, min(policy.max_tokens, math.ceil(observed * ADAPTIVE_HEADROOM)))
+
+    def route(self, task: str, template: Optional[str] = None) -> Route:
+        """Pick the model and token limit for a call, recording the decision"""
+        # Unknown templates share the task default, keeping metric labels bounded
+        template_label, policy = self._resolve(task, template)
+        provider, model = self.tiers[policy.tier]
+        with span("llm.route", task=task, template=template_label, model=model) as route_span:
+            route = Route(task, template_label, provider, model, self._adaptive_limit((task, template_label), policy))
+            if route_span is not None:
+                route_span.attributes["max_tokens"] = route.max_tokens
+
+        LLM_ROUTING_DECISIONS.inc(task, template_label, model)
+        logger.debug("Routed %s/%s to %s with max_tokens=%s", task, template_label, model, route.max_tokens)
+        return route
+
+    def observe(self, route: Route, completion_tokens: int):
+        """Record the size of a completion served on a route"""
+        truncated = completion_tokens >= route.max_tokens
+        if truncated:
+            LLM_TRUNCATIONS.inc(route.task, route.template)
+            logger.warning("%s/%s completion hit max_tokens=%s", route.task, route.template, route.max_tokens)
+            completion_tokens = route.max_tokens * 2
+
+        key = (route.task, route.template)
+        samples = self._observed.get(key)
+        if samples is None:
+            samples = self._observed[key] = deque(maxlen=ADAPTIVE_WINDOW)
+        samples.append(completion_tokens)
+
+    def limits(self) -> List[Dict[str, object]]:
+        """Current limit and sample count per observed route, for debugging"""
+        result = []
+        for (task, template), samples in self._observed.items():
+            _, policy = self._resolve(task, None if template == "-" else template)
+            result.append({
+                "task": task,
+                "template": template,
+                "model": self.tiers[policy.tier][1],
+                "maxTokens": self._adaptive_limit((task, template), policy),
+                "samples": len(samples),
+            })
+        return result
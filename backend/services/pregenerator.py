@@ -0,0 +1,190 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from models import TrendRecord
+from metrics import Counter
+from admission import AdmissionController, generation_admission
+from .ai_service import AIService, GENERATION_CACHE_TTL_SECONDS
+from .trend_service import TrendService
+
+logger = logging.getLogger(__name__)
+
+PREGEN_ENABLED = os.environ.get("PREGEN_ENABLED", "true").lower() == "true"
+PREGEN_TOP_TRENDS = int(os.environ.get("PREGEN_TOP_TRENDS", "5"))
+PREGEN_TOP_COMBINATIONS = int(os.environ.get("PREGEN_TOP_COMBINATIONS", "2"))
+PREGEN_INTERVAL_SECONDS = float(os.environ.get("PREGEN_INTERVAL_SECONDS", "10"))
+# How long the generation pool must be quiet before speculating
+PREGEN_IDLE_SECONDS = float(os.environ.get("PREGEN_IDLE_SECONDS", "2"))
+REQUEST_FREQUENCY_HALF_LIFE_SECONDS = float(os.environ.get("REQUEST_FREQUENCY_HALF_LIFE_SECONDS", "1800"))
+
+# Used until enough real requests have been seen
+DEFAULT_COMBINATIONS: List[Tuple[str, str]] = [
+    ("youtube-explainer", "professional"),
+    ("short-form", "casual"),
+]
+
+PREGENERATION_JOBS = Counter("pregeneration_jobs_total", "Speculative generations by outcome", ("outcome",))
+
+Combination = Tuple[str, str]
+
+
+class RequestFrequency:
+    """Exponentially decayed request counts per (template, tone)"""
+
+    def __init__(self, half_life_seconds: float = REQUEST_FREQUENCY_HALF_LIFE_SECONDS):
+        self.decay_rate = math.log(2) / half_life_seconds
+        self._scores: Dict[Combination, Tuple[float, float]] = {}
+
+    def _score_at(self, combination: Combination, now: float) -> float:
+        score, updated_at = self._scores.get(combination, (0.0, now))
+        return score * math.exp(-self.decay_rate * (now - updated_at))
+
+    def record(self, template_id: str, tone: str):
+        now = time.monotonic()
+        combination = (template_id, tone)
+        self._scores[combination] = (self._score_at(combination, now) + 1.0, now)
+
+    def top(self, limit: int) -> List[Combination]:
+        """Most requested combinations, hottest first"""
+        now = time.monotonic()
+        ranked = sorted(self._scores, key=lambda combination: self._score_at(combination, now), reverse=True)
+        return ranked[:limit]
+
+
+class ContentPregenerator:
+    """Speculatively generates content for hot trends while the LLM pool is idle.
+
+    Every interval, if the generation admission pool has been quiet for a
+    while, the top trends of the current snapshot are paired with the most
+    requested (template, tone) combinations and generated one at a time
+    through `AIService.pregenerate_content`, which fills the shared and
+    similarity caches. A job is cancelled as soon as a user request arrives
+    at the pool, so speculation never competes with real traffic.
+    """
+
+    def __init__(
+        self,
+        trend_service: TrendService,
+        ai_service: AIService,
+        admission: AdmissionController = generation_admission,
+        top_trends: int = PREGEN_TOP_TRENDS,
+        top_combinations: int = PREGEN_TOP_COMBINATIONS,
+        interval_seconds: float = PREGEN_INTERVAL_SECONDS,
+        idle_seconds: float = PREGEN_IDLE_SECONDS,
+        ttl_seconds: float = GENERATION_CACHE_TTL_SECONDS
+    ):
+        self.trend_service = trend_service
+        self.ai_service = ai_service
+        self.admission = admission
+        self.top_trends = top_trends
+        self.top_combinations = top_combinations
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        # Regenerate a little before the cached copy expires
+        self.refresh_after = ttl_seconds * 0.9
+        self.frequency = RequestFrequency()
+        self._generated_at: Dict[Tuple[str, str, str], float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record_request(self, template_id: str, tone: str):
+        self.frequency.record(template_id, tone)
+
+    def hot_combinations(self) -> List[Combination]:
+        combinations = self.frequency.top(self.top_combinations)
+        for combination in DEFAULT_COMBINATIONS:
+            if len(combinations) >= self.top_combinations:
+                break
+            if combination not in combinations:
+                combinations.append(combination)
+        return combinations
+
+    def _pending(self, trends: List[TrendRecord]) -> List[Tuple[TrendRecord, str, str]]:
+        """(trend, template, tone) jobs without a fresh speculative generation"""
+        now = time.monotonic()
+        self._generated_at = {
+            key: generated_at for key, generated_at in self._generated_at.items()
+            if now - generated_at < self.refresh_after
+        }
+        # Hottest combination first across all trends, then the next one
+        return [
+            (trend, template_id, tone)
+            for template_id, tone in self.hot_combinations()
+            for trend in trends
+            if (trend.id, template_id, tone) not in self._generated_at
+        ]
+
+    def _is_idle(self) -> bool:
+        return self.admission.idle_for() >= self.idle_seconds
+
+    async def _run_job(self, trend: TrendRecord, template_id: str, tone: str) -> bool:
+        """Generate one job, cancelling it if user traffic arrives; True if it completed"""
+        job = asyncio.create_task(self.ai_service.pregenerate_content(trend.to_model(), template_id, tone))
+        arrival = asyncio.create_task(self.admission.wait_for_arrival())
+        try:
+            await asyncio.wait({job, arrival}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            arrival.cancel()
+            if not job.done():
+                job.cancel()
+                # Let the job release its shared cache lease before moving on
+                await asyncio.wait({job})
+
+        if job.cancelled():
+            PREGENERATION_JOBS.inc("preempted")
+            return False
+        error = job.exception()
+        if error is not None:
+            PREGENERATION_JOBS.inc("failed")
+            raise error
+
+        PREGENERATION_JOBS.inc("generated")
+        self._generated_at[(trend.id, template_id, tone)] = time.monotonic()
+        return True
+
+    async def run_once(self) -> int:
+        """Generate pending jobs while the pool stays idle; returns how many completed"""
+        if not self.trend_service.is_warm or not self._is_idle():
+            return 0
+
+        snapshot = await self.trend_service.get_snapshot()
+        trends = [trend for _, trend in snapshot[:self.top_trends]]
+        completed = 0
+        for trend, template_id, tone in self._pending(trends):
+            if not self._is_idle():
+                break
+            try:
+                if not await self._run_job(trend, template_id, tone):
+                    break
+            except Exception as e:
+                # The LLM is likely unavailable; try again next interval
+                logger.warning("Pre-generation failed for trend %s (%s/%s): %s", trend.id, template_id, tone, e)
+                break
+            completed += 1
+
+        if completed:
+            logger.info("Pre-generated %s content scripts", completed)
+        return completed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Error in content pre-generator: %s", e)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
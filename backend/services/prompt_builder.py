@@ -0,0 +1,316 @@
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from models import Trend, ContentGenerationRequest, GeneratedContent
+
+logger = logging.getLogger(__name__)
+
+# Optional exact tokenizer; falls back to a local approximation when missing
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # pragma: no cover - depends on the environment
+    _encoding = None
+
+DEFAULT_TEMPLATE_ID = "youtube-explainer"
+DEFAULT_TONE = "professional"
+
+TEMPLATE_INSTRUCTIONS = {
+    "youtube-explainer": "You are an expert YouTube content creator specializing in 10-15 minute educational videos. Create detailed, engaging scripts with clear timestamps, hooks, and actionable content.",
+    "blog-post": "You are a professional content writer specializing in comprehensive blog posts. Create well-structured, SEO-optimized content with clear headings and valuable insights.",
+    "social-thread": "You are a social media expert creating viral Twitter/LinkedIn threads. Focus on concise, impactful points that drive engagement and sharing.",
+    "podcast-guide": "You are a podcast producer creating structured discussion guides. Focus on natural conversation flow, thought-provoking questions, and key talking points.",
+    "short-form": "You are a TikTok/Instagram Reels creator. Focus on hook-heavy, fast-paced content that captures attention in the first 3 seconds."
+}
+
+TONE_INSTRUCTIONS = {
+    "professional": "Use authoritative, business-focused language with industry expertise.",
+    "casual": "Use friendly, conversational tone like talking to a friend.",
+    "humorous": "Include appropriate humor, wit, and light-hearted commentary.",
+    "educational": "Focus on teaching and explaining concepts clearly.",
+    "controversial": "Present provocative viewpoints while maintaining respect.",
+    "inspirational": "Use motivational and uplifting language that inspires action."
+}
+
+SYSTEM_MESSAGE_TEMPLATE = """{base_instruction}
+
+Tone: {tone_instruction}
+
+Always provide:
+1. A compelling, clickable title
+2. An attention-grabbing hook
+3. Detailed content outline with timestamps (if applicable)
+4. Key points to emphasize
+5. SEO keywords and hashtags
+6. Performance predictions
+
+Format your response as a structured JSON object with all required fields."""
+
+RESPONSE_FORMAT = """Please generate a comprehensive content script in JSON format with the following structure:
+{
+    "title": "Compelling, clickable title",
+    "hook": "Attention-grabbing opening line",
+    "outline": [
+        {
+            "section": "Section name",
+            "duration": "0:00 - 1:30",
+            "content": ["Point 1", "Point 2", "Point 3"]
+        }
+    ],
+    "keyPoints": ["Key point 1", "Key point 2", "Key point 3", "Key point 4"],
+    "seoKeywords": ["keyword1", "keyword2", "keyword3", "keyword4"],
+    "hashtags": ["#hashtag1", "#hashtag2", "#hashtag3"],
+    "estimatedViews": "10K - 25K",
+    "difficulty": "Beginner-friendly"
+}"""
+
+REFINEMENT_SYSTEM_TEMPLATE = """{base_instruction}
+
+Tone: {tone_instruction}
+
+You are revising one part of an existing script. Keep it consistent with the rest of the script and return only the requested part as a JSON object."""
+
+# JSON shape expected back for each refinement target
+REFINEMENT_FORMATS = {
+    "title": '{"title": "New title"}',
+    "hook": '{"hook": "New opening line"}',
+    "section": '{"section": "Section name", "duration": "0:00 - 1:30", "content": ["Point 1", "Point 2", "Point 3"]}',
+}
+
+# Token budget for the user prompt (system prompt excluded)
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "600"))
+REFINEMENT_TOKEN_BUDGET = int(os.environ.get("REFINEMENT_TOKEN_BUDGET", "400"))
+
+_APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens locally (exact with tiktoken, approximate otherwise)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Words and punctuation are roughly one token each; long words split further
+    return sum(1 + len(piece) // 8 for piece in _APPROX_TOKEN_PATTERN.findall(text))
+
+
+def _compile_system_messages(template: str = SYSTEM_MESSAGE_TEMPLATE) -> Dict[Tuple[str, str], Tuple[str, int]]:
+    """Render every (template_id, tone) system message once, with its token count"""
+    compiled = {}
+    for template_id, base_instruction in TEMPLATE_INSTRUCTIONS.items():
+        for tone, tone_instruction in TONE_INSTRUCTIONS.items():
+            message = template.format(
+                base_instruction=base_instruction,
+                tone_instruction=tone_instruction
+            )
+            compiled[(template_id, tone)] = (message, count_tokens(message))
+    return compiled
+
+
+_SYSTEM_MESSAGES = _compile_system_messages()
+_REFINEMENT_SYSTEM_MESSAGES = _compile_system_messages(REFINEMENT_SYSTEM_TEMPLATE)
+_RESPONSE_FORMAT_TOKENS = count_tokens(RESPONSE_FORMAT)
+
+
+def _system_message_key(template_id: str, tone: str) -> Tuple[str, str]:
+    if template_id not in TEMPLATE_INSTRUCTIONS:
+        template_id = DEFAULT_TEMPLATE_ID
+    if tone not in TONE_INSTRUCTIONS:
+        tone = DEFAULT_TONE
+    return template_id, tone
+
+
+def get_system_message(template_id: str, tone: str) -> Tuple[str, int]:
+    """Get the precompiled system message and its token count"""
+    return _SYSTEM_MESSAGES[_system_message_key(template_id, tone)]
+
+
+@dataclass
+class BuiltPrompt:
+    """A rendered prompt pair with local token accounting"""
+    system_message: str
+    user_prompt: str
+    system_tokens: int
+    prompt_tokens: int
+    trimmed_sections: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.prompt_tokens
+
+
+def _bullet_lines(items: List[str]) -> List[str]:
+    return [f"- {item}" for item in items]
+
+
+def _engagement_lines(trend: Trend) -> List[str]:
+    engagement = trend.engagement
+    return [
+        f"- Twitter: {engagement.twitter.mentions} mentions, sentiment: {engagement.twitter.sentiment:.2f}",
+        f"- YouTube: {engagement.youtube.videos} videos, {engagement.youtube.totalViews} total views",
+        f"- Reddit: {engagement.reddit.upvotes} upvotes, {engagement.reddit.comments} comments"
+    ]
+
+
+# Optional trend context in priority order: (heading, line builder)
+_CONTEXT_SECTIONS: List[Tuple[str, Callable[[Trend], List[str]]]] = [
+    ("Key Insights", lambda trend: _bullet_lines(trend.keyInsights)),
+    ("Suggested Angles", lambda trend: _bullet_lines(trend.suggestedAngles)),
+    ("Platform Engagement Data", _engagement_lines),
+]
+
+
+def build_content_prompt(
+    trend: Trend,
+    request: ContentGenerationRequest,
+    token_budget: Optional[int] = None
+) -> BuiltPrompt:
+    """Build the system and user prompts, trimming trend context to fit the token budget"""
+
+    budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    system_message, system_tokens = get_system_message(request.template_id, request.tone)
+
+    # Required context is always sent
+    header_lines = [
+        "Create a content script for the following trending topic:",
+        "",
+        f"**Topic**: {trend.topic}",
+        f"**Category**: {trend.category}",
+        f"**Content Score**: {trend.contentScore}/100",
+        f"**Trend Velocity**: {trend.trendVelocity}",
+        f"**Primary Platform**: {trend.platform}",
+        f"**Hashtags**: {', '.join(trend.hashtags)}",
+    ]
+    footer_lines = [
+        f"**Template**: {request.template_id}",
+        f"**Tone**: {request.tone}",
+    ]
+    if request.custom_prompt:
+        footer_lines.append(f"Additional instructions: {request.custom_prompt}")
+
+    header = "\n".join(header_lines)
+    footer = "\n".join(footer_lines)
+    used = count_tokens(header) + count_tokens(footer) + _RESPONSE_FORMAT_TOKENS
+
+    # Add optional sections line by line, highest priority first, while they fit
+    sections = []
+    trimmed_sections = []
+    for heading, build_lines in _CONTEXT_SECTIONS:
+        lines = build_lines(trend)
+        if not lines:
+            continue
+
+        heading_text = f"**{heading}**:"
+        kept = []
+        cost = count_tokens(heading_text)
+        for line in lines:
+            line_cost = count_tokens(line)
+            if used + cost + line_cost > budget:
+                break
+            kept.append(line)
+            cost += line_cost
+
+        if len(kept) < len(lines):
+            trimmed_sections.append(heading)
+        if kept:
+            sections.append("\n".join([heading_text] + kept))
+            used += cost
+
+    user_prompt = "\n\n".join([header] + sections + [footer, RESPONSE_FORMAT])
+    prompt_tokens = count_tokens(user_prompt)
+
+    if trimmed_sections:
+        logger.debug("Trimmed prompt sections to fit %s tokens: %s", budget, ', '.join(trimmed_sections))
+
+    return BuiltPrompt(
+        system_message=system_message,
+        user_prompt=user_prompt,
+        system_tokens=system_tokens,
+        prompt_tokens=prompt_tokens,
+        trimmed_sections=trimmed_sections
+    )
+
+
+def _outline_lines(content: GeneratedContent) -> List[str]:
+    return [f"{i}. {section.section} ({section.duration})" for i, section in enumerate(content.outline)]
+
+
+def build_refinement_prompt(
+    content: GeneratedContent,
+    target: str,
+    section_index: Optional[int] = None,
+    instructions: Optional[str] = None,
+    summary: str = "",
+    history: Optional[List[Dict[str, Any]]] = None,
+    token_budget: Optional[int] = None
+) -> BuiltPrompt:
+    """Build a prompt that rewrites one part of a script in context.
+
+    Only the script's skeleton (title, hook, section headings) and the part
+    being rewritten are sent, plus as much recent session history as fits.
+    """
+
+    budget = REFINEMENT_TOKEN_BUDGET if token_budget is None else token_budget
+    system_message, system_tokens = _REFINEMENT_SYSTEM_MESSAGES[_system_message_key(content.template_id, content.tone)]
+
+    if target == "section":
+        section = content.outline[section_index]
+        label = f"section {section_index} (\"{section.section}\")"
+        current = "\n".join([f"{section.section} ({section.duration})"] + _bullet_lines(section.content))
+    else:
+        label = target
+        current = getattr(content, target)
+
+    header = "\n".join([
+        f"Rewrite the {label} of this {content.template_id} script.",
+        "",
+        f"**Title**: {content.title}",
+        f"**Hook**: {content.hook}",
+        "**Outline**:",
+        *_outline_lines(content),
+        "",
+        f"**Current {target}**:",
+        current,
+    ])
+    footer_lines = [f"**Instructions**: {instructions or 'Make it more engaging while keeping the same intent.'}"]
+    footer_lines.append(f"Respond with JSON only, in this format: {REFINEMENT_FORMATS[target]}")
+    footer = "\n".join(footer_lines)
+    used = count_tokens(header) + count_tokens(footer)
+
+    # Session context, newest first, while it fits
+    context_lines = []
+    trimmed_sections = []
+    candidates = [f"- {m['role']}: {m['content']}" for m in reversed(history or [])]
+    if summary:
+        candidates.append(f"- earlier: {summary}")
+    for line in candidates:
+        line_cost = count_tokens(line)
+        if used + line_cost > budget:
+            trimmed_sections.append("Session History")
+            break
+        context_lines.append(line)
+        used += line_cost
+
+    def render(lines: List[str]) -> str:
+        sections = [header]
+        if lines:
+            sections.append("\n".join(["**Earlier in this session**:"] + list(reversed(lines))))
+        return "\n\n".join(sections + [footer])
+
+    user_prompt = render(context_lines)
+    prompt_tokens = count_tokens(user_prompt)
+    # The heading and separators aren't in the estimate above; drop the oldest lines until it fits
+    while context_lines and prompt_tokens > budget:
+        context_lines.pop()
+        if "Session History" not in trimmed_sections:
+            trimmed_sections.append("Session History")
+        user_prompt = render(context_lines)
+        prompt_tokens = count_tokens(user_prompt)
+
+    return BuiltPrompt(
+        system_message=system_message,
+        user_prompt=user_prompt,
+        system_tokens=system_tokens,
+        prompt_tokens=prompt_tokens,
+        trimmed_sections=trimmed_sections
+    )
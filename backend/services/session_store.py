@@ -0,0 +1,130 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from models import ChatSession, GeneratedContent
+from database import save_chat_session, get_chat_session
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORE_MAX_SESSIONS = int(os.environ.get("SESSION_STORE_MAX_SESSIONS", "2000"))
+SESSION_STORE_TTL_SECONDS = int(os.environ.get("SESSION_STORE_TTL_SECONDS", str(3600)))
+# Recent turns kept verbatim; older ones are folded into the summary
+SESSION_MAX_MESSAGES = int(os.environ.get("SESSION_MAX_MESSAGES", "6"))
+SESSION_SUMMARY_MAX_CHARS = int(os.environ.get("SESSION_SUMMARY_MAX_CHARS", "600"))
+SESSION_MESSAGE_MAX_CHARS = 400
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _digest(message: Dict[str, Any]) -> str:
+    """One-line summary of a user turn; assistant turns live on in the script itself"""
+    target = message.get("target", "script")
+    return f"{target}: {message['content']}" if message.get("content") else f"{target}: regenerated"
+
+
+class SessionConflict(Exception):
+    """The session was changed by another request since it was read"""
+
+
+class SessionStore:
+    """Bounded store of refinement sessions, one per generated script.
+
+    Sessions live in an in-process LRU (evicted by count and idle time) and
+    are written through to the `chat_sessions` collection, so any worker can
+    pick up a session and restarts don't lose them. Every save is
+    conditional on the version that was read: a save over a session another
+    worker (or a concurrent request) has since changed raises
+    SessionConflict and evicts the stale local copy, so the retry reloads
+    it from Mongo instead of overwriting the newer one. History is compacted on
+    every append: only the last `max_messages` turns are kept verbatim, older
+    user turns are folded into a short summary and message text is clipped,
+    keeping refinement prompts small however long a session runs.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_STORE_MAX_SESSIONS,
+        ttl_seconds: float = SESSION_STORE_TTL_SECONDS,
+        max_messages: int = SESSION_MAX_MESSAGES,
+        summary_max_chars: int = SESSION_SUMMARY_MAX_CHARS
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.summary_max_chars = summary_max_chars
+        self._sessions: "OrderedDict[str, Tuple[float, ChatSession]]" = OrderedDict()
+
+    def _remember(self, session: ChatSession):
+        self._sessions[session.id] = (time.monotonic(), session)
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def save(self, session: ChatSession):
+        """Persist a changed session; raises SessionConflict if it changed since it was read"""
+        updated_at = datetime.utcnow()
+        data = {**session.dict(), "version": session.version + 1, "updated_at": updated_at}
+        try:
+            saved = await save_chat_session(data, expected_version=session.version)
+        except Exception as e:
+            # The in-process copy still serves this worker; its version still matches Mongo
+            logger.error("Error persisting chat session %s: %s", session.id, e)
+            self._remember(session)
+            return
+        if not saved:
+            self._sessions.pop(session.id, None)
+            raise SessionConflict(f"Session {session.id} was changed by another request")
+        session.version += 1
+        session.updated_at = updated_at
+        self._remember(session)
+
+    async def create(self, content: GeneratedContent) -> ChatSession:
+        """Start a session for a generated script, keyed by the script's ID"""
+        session = ChatSession(id=content.id, user_id=content.user_id, content=content)
+        self._remember(session)
+        try:
+            await save_chat_session(session.dict())
+        except Exception as e:
+            logger.error("Error persisting chat session %s: %s", session.id, e)
+        return session
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        """A private copy of the session; concurrent requests must not share one"""
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            touched_at, session = entry
+            if time.monotonic() - touched_at <= self.ttl_seconds:
+                self._sessions.move_to_end(session_id)
+                return session.copy(deep=True)
+            del self._sessions[session_id]
+
+        stored = await get_chat_session(session_id)
+        if not stored:
+            return None
+        session = ChatSession(**stored)
+        self._remember(session)
+        return session.copy(deep=True)
+
+    def append(self, session: ChatSession, role: str, content: str, **metadata: Any):
+        """Add a turn to the history, compacting older turns into the summary"""
+        session.messages.append({"role": role, "content": _clip(content, SESSION_MESSAGE_MAX_CHARS), **metadata})
+
+        overflow = len(session.messages) - self.max_messages
+        if overflow <= 0:
+            return
+        dropped, session.messages = session.messages[:overflow], session.messages[overflow:]
+        lines = [_digest(message) for message in dropped if message["role"] == "user"]
+        if lines:
+            summary = "; ".join(filter(None, [session.summary] + lines))
+            # Keep the most recent part of the digest
+            if len(summary) > self.summary_max_chars:
+                summary = "..." + summary[-(self.summary_max_chars - 3):]
+            session.summary = summary
+
+
+session_store = SessionStore()
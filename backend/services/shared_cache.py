@@ -0,0 +1,161 @@
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+from pymongo.errors import DuplicateKeyError
+from database import get_database
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_ENABLED = os.environ.get("SHARED_CACHE_ENABLED", "true").lower() == "true"
+# How long a worker may hold a compute lock before others take over
+SHARED_CACHE_LOCK_SECONDS = float(os.environ.get("SHARED_CACHE_LOCK_SECONDS", "60"))
+SHARED_CACHE_POLL_SECONDS = float(os.environ.get("SHARED_CACHE_POLL_SECONDS", "0.2"))
+
+
+class SharedCache:
+    """Cross-worker cache stored in the `shared_cache` Mongo collection.
+
+    Documents expire through a TTL index on `expires_at`. Misses are computed
+    by a single worker holding a lease on the key (`lock_until`/`owner`); other
+    workers poll for the value until the lease runs out, then compute
+    themselves. While leased, a document expires with its lease until a value
+    is stored, and it is deleted when the computation fails.
+    Without a database connection values are computed locally.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SHARED_CACHE_ENABLED,
+        lock_seconds: float = SHARED_CACHE_LOCK_SECONDS,
+        poll_seconds: float = SHARED_CACHE_POLL_SECONDS
+    ):
+        self.enabled = enabled
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+
+    async def _collection(self):
+        db = await get_database()
+        return db.shared_cache if db is not None else None
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get an unexpired value, or None"""
+        collection = await self._collection()
+        if collection is None:
+            return None
+        doc = await collection.find_one(
+            {"_id": key, "value": {"$exists": True}, "expires_at": {"$gt": datetime.utcnow()}},
+            {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def _acquire(self, collection, key: str) -> Optional[str]:
+        """Try to take the compute lease for a key; returns the lease token or None.
+
+        Tokens are per acquisition rather than per process: workers forked
+        from one master would otherwise share an owner id, and a worker whose
+        lease expired could release or overwrite the lease another took over.
+        """
+        now = datetime.utcnow()
+        lock_until = now + timedelta(seconds=self.lock_seconds)
+        token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        try:
+            await collection.update_one(
+                {
+                    "_id": key,
+                    "$and": [
+                        {"$or": [{"lock_until": {"$exists": False}}, {"lock_until": {"$lt": now}}]},
+                        # Never take over a live value stored since our lookup
+                        {"$or": [{"expires_at": {"$exists": False}}, {"expires_at": {"$lte": now}}]},
+                    ],
+                },
+                {
+                    # The document lives as long as the lease: the TTL monitor
+                    # must not delete it mid-compute (an expired value's old
+                    # expires_at is already past), and removes it if no value
+                    # is ever stored
+                    "$set": {"lock_until": lock_until, "owner": token, "expires_at": lock_until},
+                    "$unset": {"value": ""}
+                },
+                upsert=True
+            )
+            return token
+        except DuplicateKeyError:
+            # The document exists and holds an active lease or a live value
+            return None
+
+    async def _release(self, collection, key: str, token: str, value: Any = None, ttl_seconds: Optional[float] = None):
+        """Store the computed value, or without a TTL drop the lease after a failure"""
+        if ttl_seconds is None:
+            # We only compute when no live value exists, so nothing is lost
+            await collection.delete_one({"_id": key, "owner": token})
+            return
+        await collection.update_one({"_id": key, "owner": token}, {
+            "$set": {"value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)},
+            "$unset": {"lock_until": "", "owner": ""}
+        })
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: float
+    ) -> Any:
+        """Return the shared value for a key, computing it in at most one worker at a time.
+
+        `compute` must return a BSON-serializable value.
+        """
+        if not self.enabled:
+            return await compute()
+
+        collection = None
+        token = None
+        try:
+            collection = await self._collection()
+            if collection is not None:
+                cached = await self.get(key)
+                if cached is not None:
+                    return cached
+
+                deadline = asyncio.get_running_loop().time() + self.lock_seconds
+                while token is None:
+                    token = await self._acquire(collection, key)
+                    if token is not None:
+                        break
+                    await asyncio.sleep(self.poll_seconds)
+                    cached = await self.get(key)
+                    if cached is not None:
+                        return cached
+                    if asyncio.get_running_loop().time() > deadline:
+                        logger.warning("Timed out waiting for shared cache key %s, computing locally", key)
+                        break
+        except Exception as e:
+            logger.error("Shared cache unavailable for %s: %s", key, e)
+
+        if token is None:
+            return await compute()
+
+        try:
+            # Another worker may have stored the value just before we took the lease
+            value = await self.get(key)
+            if value is None:
+                value = await compute()
+        except BaseException:
+            # Also on cancellation, so waiting workers don't sit out the lease
+            try:
+                await self._release(collection, key, token)
+            except Exception as e:
+                logger.error("Error releasing shared cache key %s: %s", key, e)
+            raise
+
+        try:
+            await self._release(collection, key, token, value, ttl_seconds)
+        except Exception as e:
+            logger.error("Error storing shared cache key %s: %s", key, e)
+        return value
+
+
+shared_cache = SharedCache()
@@ -0,0 +1,119 @@
+import os
+import re
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, FrozenSet, Optional, Tuple
+from models import GeneratedContent
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_CACHE_ENABLED = os.environ.get("SIMILARITY_CACHE_ENABLED", "true").lower() == "true"
+SIMILARITY_THRESHOLD = float(os.environ.get("SIMILARITY_CACHE_THRESHOLD", "0.9"))
+SIMILARITY_CACHE_MAX_KEYS = int(os.environ.get("SIMILARITY_CACHE_MAX_KEYS", "1000"))
+SIMILARITY_CACHE_PER_KEY = int(os.environ.get("SIMILARITY_CACHE_PER_KEY", "20"))
+
+# Filler words that do not change what a refinement asks for. Negations and
+# comparatives ("not", "more", "less", "too") are content: they flip the request.
+_STOPWORDS = frozenset({
+    "a", "an", "the", "it", "its", "this", "that", "make", "bit", "little",
+    "please", "be", "is", "and", "to", "of", "for", "with", "some", "much", "very",
+    "can", "you", "should", "lot", "really", "just", "so", "in", "on"
+})
+
+# Longest suffixes first so "punchier" and "punchy" both reduce to "punch"
+_SUFFIXES = ("iness", "ness", "ier", "iest", "ing", "ed", "er", "est", "ly", "es", "y", "s")
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# (trend_id, template_id, tone, owner)
+CacheKey = Tuple[str, str, str, str]
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Normalize a custom prompt to its stemmed content words"""
+    if not text:
+        return ""
+    words = (_stem(word) for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS)
+    return " ".join(sorted(set(words)))
+
+
+def _tokens(normalized: str) -> FrozenSet[str]:
+    return frozenset(normalized.split())
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 1.0 if not a and not b else 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityCache:
+    """Bounded in-process cache of recent generations, matched by prompt similarity.
+
+    Entries are bucketed by (trend_id, template_id, tone, owner), where the
+    owner is the requesting user for custom prompts and empty otherwise, so
+    prompted scripts are never served to another user. Within a bucket the
+    request's custom prompt is compared against recent prompts by Jaccard
+    similarity of their stemmed content words. Word-level comparison keeps
+    prompts that differ in one meaningful word ("Europe"/"Asia",
+    "more"/"less") apart; with the default threshold short prompts must use
+    the same words, up to stopwords, word order and suffixes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        max_keys: int = SIMILARITY_CACHE_MAX_KEYS,
+        per_key: int = SIMILARITY_CACHE_PER_KEY,
+        enabled: bool = SIMILARITY_CACHE_ENABLED
+    ):
+        self.threshold = threshold
+        self.max_keys = max_keys
+        self.per_key = per_key
+        self.enabled = enabled
+        self._entries: "OrderedDict[CacheKey, Deque[Tuple[FrozenSet[str], GeneratedContent]]]" = OrderedDict()
+
+    def lookup(self, key: CacheKey, custom_prompt: Optional[str]) -> Optional[Tuple[GeneratedContent, float]]:
+        """Return the most similar cached generation and its score, if above the threshold"""
+        if not self.enabled:
+            return None
+
+        bucket = self._entries.get(key)
+        if not bucket:
+            return None
+        self._entries.move_to_end(key)
+
+        tokens = _tokens(normalize_prompt(custom_prompt))
+        best: Optional[Tuple[GeneratedContent, float]] = None
+        for cached_tokens, content in bucket:
+            score = _jaccard(tokens, cached_tokens)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (content, score)
+
+        return best
+
+    def store(self, key: CacheKey, custom_prompt: Optional[str], content: GeneratedContent):
+        """Remember a generation for later similar requests"""
+        if not self.enabled:
+            return
+
+        bucket = self._entries.get(key)
+        if bucket is None:
+            bucket = deque(maxlen=self.per_key)
+            self._entries[key] = bucket
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+
+        bucket.append((_tokens(normalize_prompt(custom_prompt)), content))
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,97 @@
+import os
+import json
+import mmap
+import time
+import struct
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TREND_SHARED_SNAPSHOT_PATH = Path(os.environ.get(
+    "TREND_SHARED_SNAPSHOT_PATH", str(Path(__file__).parent.parent / "cache" / "trend_snapshot.bin")
+))
+# How often a worker looks for a snapshot published by another worker
+TREND_SHARED_SNAPSHOT_CHECK_SECONDS = float(os.environ.get("TREND_SHARED_SNAPSHOT_CHECK_SECONDS", "1"))
+
+# magic, format version, snapshot version (build time in ms), payload length
+HEADER = struct.Struct("<4sIQQ")
+MAGIC = b"TSNP"
+FORMAT_VERSION = 1
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat()
+
+
+class SharedSnapshotFile:
+    """Trend snapshot published to a memory-mapped file shared by local workers.
+
+    The file is a fixed header followed by the snapshot payload as JSON.
+    Publishing writes a new file and renames it into place, so readers never
+    see a partial snapshot. Readers map the file read-only: every worker on
+    the host reads the same page-cache pages, checks the version in the
+    header and only decodes the payload when the version changed.
+    """
+
+    def __init__(self, path: Path = TREND_SHARED_SNAPSHOT_PATH, check_interval: float = TREND_SHARED_SNAPSHOT_CHECK_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self._identity: Optional[Tuple[int, int, int]] = None
+        self._checked_at = 0.0
+        self.version: Optional[int] = None
+
+    def publish(self, payload: Dict[str, Any]) -> bool:
+        """Publish a snapshot payload unless the file already has it or a newer one"""
+        version = int(payload["built_at"] * 1000)
+        if self.version is not None and version <= self.version:
+            return False
+
+        try:
+            data = json.dumps(payload, default=_json_default).encode("utf-8")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, len(data)))
+                f.write(data)
+            tmp_path.replace(self.path)
+            self.version = version
+            return True
+        except Exception as e:
+            logger.error("Error publishing shared trend snapshot: %s", e)
+            return False
+
+    def read_if_changed(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """The published payload if it changed since the last read, else None.
+
+        Looks at the file at most once per `check_interval` unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return None
+        self._checked_at = now
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity == self._identity:
+            return None
+
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, format_version, version, length = HEADER.unpack_from(mapped)
+                if magic != MAGIC or format_version != FORMAT_VERSION or HEADER.size + length > len(mapped):
+                    raise ValueError("not a trend snapshot file")
+                self._identity = identity
+                if self.version is not None and version <= self.version:
+                    return None
+                payload = json.loads(mapped[HEADER.size:HEADER.size + length])
+        except Exception as e:
+            logger.error("Error reading shared trend snapshot: %s", e)
+            return None
+
+        self.version = version
+        return payload
@@ -0,0 +1,226 @@
+import os
+import re
+import json
+import logging
+from itertools import chain
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from models import EngagementMetrics
+
+logger = logging.getLogger(__name__)
+
+TREND_SCORING_WEIGHTS_PATH = os.environ.get("TREND_SCORING_WEIGHTS_PATH")
+
+# (platform, metric, reference value of a typical trending topic)
+COUNT_FEATURES = [
+    ("twitter", "mentions", 45000),
+    ("twitter", "posts", 12500),
+    ("youtube", "videos", 234),
+    ("youtube", "totalViews", 890000),
+    ("youtube", "avgViews", 3800),
+    ("reddit", "posts", 89),
+    ("reddit", "upvotes", 15600),
+    ("reddit", "comments", 2400),
+    ("tiktok", "videos", 156),
+    ("tiktok", "totalViews", 456000),
+]
+RATE_FEATURES = [
+    ("twitter", "sentiment", 0.8),
+    ("tiktok", "engagement", 0.12),
+]
+
+FEATURE_NAMES = (
+    [f"{platform}.{metric}" for platform, metric, _ in COUNT_FEATURES + RATE_FEATURES]
+    + ["velocity", "growth"]
+)
+
+# Hours since detection at which a typical topic's activity rate is the reference
+REFERENCE_HOURS = 6.0
+
+DEFAULT_BIAS = 2.0
+DEFAULT_WEIGHTS = {
+    "twitter.mentions": 0.5,
+    "twitter.posts": 0.3,
+    "youtube.videos": 0.2,
+    "youtube.totalViews": 0.4,
+    "youtube.avgViews": 0.2,
+    "reddit.posts": 0.15,
+    "reddit.upvotes": 0.3,
+    "reddit.comments": 0.25,
+    "tiktok.videos": 0.2,
+    "tiktok.totalViews": 0.5,
+    "twitter.sentiment": 0.8,
+    "tiktok.engagement": 0.5,
+    "velocity": 0.2,
+    "growth": 1.0,
+}
+DEFAULT_CATEGORY_BIAS = {
+    "Technology": 0.15,
+    "Business": 0.1,
+    "Finance": 0.05,
+}
+
+# Velocity labels by minimum velocity signal, fastest first
+VELOCITY_LABELS = [
+    (1.0, "Exploding"),
+    (0.0, "Rising Fast"),
+    (-1.5, "Steady Growth"),
+]
+SLOWEST_VELOCITY_LABEL = "Declining Slow"
+
+_TIMEFRAME_PATTERN = re.compile(r"(\d+)\s*(h|hours?|d|days?)\b")
+
+# Pull each trend's metrics in one C-level call
+_COUNT_GETTER = attrgetter(*[f"{platform}.{metric}" for platform, metric, _ in COUNT_FEATURES])
+_RATE_GETTER = attrgetter(*[f"{platform}.{metric}" for platform, metric, _ in RATE_FEATURES])
+_COUNT_REFERENCE = np.log1p([reference for _, _, reference in COUNT_FEATURES])
+_RATE_REFERENCE = np.array([reference for _, _, reference in RATE_FEATURES])
+
+
+def timeframe_hours(timeframe: str) -> float:
+    """Hours since detection from a timeframe like "3h ago" or "2 days ago" """
+    match = _TIMEFRAME_PATTERN.search(timeframe or "")
+    if not match:
+        return REFERENCE_HOURS
+    value = float(match.group(1))
+    return value * 24 if match.group(2).startswith("d") else value
+
+
+def _metric_matrix(getter: attrgetter, engagements: Sequence[EngagementMetrics], width: int) -> np.ndarray:
+    values = np.fromiter(chain.from_iterable(map(getter, engagements)), dtype=float, count=len(engagements) * width)
+    return values.reshape(len(engagements), width)
+
+
+def _count_matrix(engagements: Sequence[EngagementMetrics]) -> np.ndarray:
+    """Log engagement counts relative to the reference, one row per trend"""
+    raw = _metric_matrix(_COUNT_GETTER, engagements, len(COUNT_FEATURES))
+    return np.log1p(np.maximum(raw, 0)) - _COUNT_REFERENCE
+
+
+def engagement_features(
+    engagements: Sequence[EngagementMetrics],
+    hours_since_detection: Sequence[float],
+    previous_engagements: Optional[Sequence[Optional[EngagementMetrics]]] = None
+) -> np.ndarray:
+    """Feature matrix (trends x FEATURE_NAMES) for the scoring model.
+
+    Counts are log ratios to a typical trending topic and rates are relative
+    deviations from it. `velocity` is the log activity rate per hour since
+    detection relative to the reference, and `growth` the mean log change in
+    counts since the previous snapshot (0 for trends without one).
+    """
+    counts = _count_matrix(engagements)
+    rates = _metric_matrix(_RATE_GETTER, engagements, len(RATE_FEATURES)) / _RATE_REFERENCE - 1
+
+    activity = counts.mean(axis=1)
+    hours = np.maximum(np.asarray(hours_since_detection, dtype=float), 0.5)
+    velocity = activity - np.log(hours / REFERENCE_HOURS)
+
+    growth = np.zeros(len(engagements))
+    if previous_engagements is not None:
+        known = [i for i, previous in enumerate(previous_engagements) if previous is not None]
+        if known:
+            previous_counts = _count_matrix([previous_engagements[i] for i in known])
+            growth[known] = (counts[known] - previous_counts).mean(axis=1)
+
+    return np.column_stack([counts, rates, velocity, growth])
+
+
+class TrendScoringModel:
+    """Logistic scoring model mapping engagement features to a 0-100 contentScore.
+
+    score = 100 * sigmoid(bias + features . weights + category_bias[category])
+
+    Weights are keyed by feature name so they can be tuned by hand, or fitted
+    offline with `fit` and loaded from JSON via TREND_SCORING_WEIGHTS_PATH.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        bias: float = DEFAULT_BIAS,
+        category_bias: Optional[Dict[str, float]] = None
+    ):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        unknown = set(weights) - set(FEATURE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown scoring features: {', '.join(sorted(unknown))}")
+        self.weights = weights
+        self.bias = bias
+        self.category_bias = dict(DEFAULT_CATEGORY_BIAS if category_bias is None else category_bias)
+        self._weight_vector = np.array([weights[name] for name in FEATURE_NAMES])
+
+    def logits(self, features: np.ndarray, categories: Sequence[str]) -> np.ndarray:
+        offsets = np.array([self.category_bias.get(category, 0.0) for category in categories])
+        return self.bias + features @ self._weight_vector + offsets
+
+    def score(self, features: np.ndarray, categories: Sequence[str]) -> np.ndarray:
+        """Integer content scores in [0, 100], one per feature row"""
+        scores = 100.0 / (1.0 + np.exp(-self.logits(features, categories)))
+        return np.clip(np.rint(scores), 0, 100).astype(int)
+
+    @staticmethod
+    def velocity_labels(features: np.ndarray) -> List[str]:
+        """Trend velocity label from the velocity and growth signals"""
+        signal = features[:, FEATURE_NAMES.index("velocity")] + features[:, FEATURE_NAMES.index("growth")]
+        labels = []
+        for value in signal:
+            for threshold, label in VELOCITY_LABELS:
+                if value > threshold:
+                    labels.append(label)
+                    break
+            else:
+                labels.append(SLOWEST_VELOCITY_LABEL)
+        return labels
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        categories: Sequence[str],
+        target_scores: Sequence[float],
+        l2: float = 1.0
+    ) -> "TrendScoringModel":
+        """Fit weights to known scores by ridge regression on the score logits"""
+        names = sorted(set(categories))
+        one_hot = np.array([[category == name for name in names] for category in categories], dtype=float)
+        design = np.column_stack([np.ones(len(features)), features, one_hot])
+
+        targets = np.clip(np.asarray(target_scores, dtype=float) / 100.0, 0.01, 0.99)
+        logits = np.log(targets / (1 - targets))
+
+        penalty = l2 * np.eye(design.shape[1])
+        penalty[0, 0] = 0.0  # don't shrink the bias
+        solution = np.linalg.solve(design.T @ design + penalty, design.T @ logits)
+
+        return cls(
+            weights=dict(zip(FEATURE_NAMES, solution[1:1 + len(FEATURE_NAMES)].tolist())),
+            bias=float(solution[0]),
+            category_bias=dict(zip(names, solution[1 + len(FEATURE_NAMES):].tolist()))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"bias": self.bias, "weights": self.weights, "categoryBias": self.category_bias}
+
+    def save(self, path: Path):
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> "TrendScoringModel":
+        data = json.loads(path.read_text())
+        return cls(weights=data.get("weights"), bias=data.get("bias", DEFAULT_BIAS), category_bias=data.get("categoryBias"))
+
+
+def load_scoring_model() -> TrendScoringModel:
+    """The configured model, falling back to the default weights"""
+    if TREND_SCORING_WEIGHTS_PATH:
+        try:
+            return TrendScoringModel.load(Path(TREND_SCORING_WEIGHTS_PATH))
+        except Exception as e:
+            logger.error("Error loading trend scoring weights, using defaults: %s", e)
+    return TrendScoringModel()
+
+
+trend_scoring_model = load_scoring_model()
@@ -0,0 +1,109 @@
+import json
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from models import TrendRecord, TREND_SUMMARY_FIELDS, trend_field_include
+
+logger = logging.getLogger(__name__)
+
+# Number of past deltas kept for reconnecting clients
+DELTA_HISTORY_SIZE = 200
+
+_SUMMARY_INCLUDE = trend_field_include(TREND_SUMMARY_FIELDS)
+# Reset on every snapshot rebuild, so they never mark a trend as updated alone
+_TIMESTAMP_FIELDS = frozenset(("created_at", "updated_at"))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _summary(trend: TrendRecord) -> Dict[str, Any]:
+    return trend.to_dict(include=_SUMMARY_INCLUDE)
+
+
+def _changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Changed fields, or nothing when only rebuild timestamps moved"""
+    changes = {key: value for key, value in new.items() if old.get(key) != value}
+    if _TIMESTAMP_FIELDS.issuperset(changes):
+        return {}
+    return changes
+
+
+class TrendChangeFeed:
+    """Versioned feed of trend snapshot changes for push subscribers.
+
+    Each published snapshot is diffed once against the previous one and the
+    delta is encoded once; every subscriber receives the same pre-encoded
+    event, so publishing costs O(changed trends) regardless of client count.
+    """
+
+    def __init__(self, history_size: int = DELTA_HISTORY_SIZE):
+        self.version: Optional[int] = None
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        # (previous version, version, encoded delta)
+        self._history: Deque[Tuple[int, int, str]] = deque(maxlen=history_size)
+        self._changed = asyncio.Event()
+
+    def publish(self, version: int, trends: List[TrendRecord]):
+        """Record a new snapshot version and the delta from the previous one"""
+        if version == self.version:
+            return
+
+        summaries = {trend.id: _summary(trend) for trend in trends}
+        if self.version is not None:
+            added = [summary for trend_id, summary in summaries.items() if trend_id not in self._summaries]
+            removed = [trend_id for trend_id in self._summaries if trend_id not in summaries]
+            updated = []
+            for trend_id, summary in summaries.items():
+                previous = self._summaries.get(trend_id)
+                if previous is not None:
+                    changes = _changed_fields(previous, summary)
+                    if changes:
+                        updated.append({"id": trend_id, **changes})
+
+            delta = {
+                "version": version,
+                "previousVersion": self.version,
+                "added": added,
+                "removed": removed,
+                "updated": updated
+            }
+            self._history.append((self.version, version, json.dumps(delta, default=_json_default)))
+
+        self.version = version
+        self._summaries = summaries
+
+        # Wake every waiting subscriber, then arm a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def snapshot_event(self) -> str:
+        """Full current state, for new clients or ones too far behind for deltas"""
+        return json.dumps(
+            {"version": self.version, "trends": list(self._summaries.values())},
+            default=_json_default
+        )
+
+    def deltas_since(self, version: int) -> Optional[List[Tuple[int, str]]]:
+        """Encoded deltas after `version`, or None if the history no longer covers it"""
+        if version == self.version:
+            return []
+        # The history covers every version it has a delta from
+        if not any(previous == version for previous, _, _ in self._history):
+            return None
+        return [(v, payload) for previous, v, payload in self._history if v > version]
+
+    async def wait_for_change(self, known_version: Optional[int], timeout: float) -> bool:
+        """Wait until a version newer than `known_version` is published; False on timeout"""
+        if self.version != known_version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,195 @@
+"""Per-request tracing spans and an on-demand sampling profiler.
+
+Tracing is off unless a request opts in, in which case the request gets a root
+span in a context variable and `span()`/`traced()` attach child spans to it.
+With no active trace they only do a context variable lookup.
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+TRACE_HISTORY_SIZE = int(os.environ.get("TRACE_HISTORY_SIZE", "200"))
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "attributes", "children")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "startMs": round((self.start - origin) * 1000, 3),
+            "durationMs": round((end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children]
+        }
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the active trace; a no-op when tracing is off"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Decorator wrapping a sync or async function in a span"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack on a background thread.
+
+    Stacks are collected in folded format ("outer;inner count"), which
+    flamegraph.pl, speedscope and similar tools accept directly. Profiling the
+    event loop thread also captures other requests interleaved with this one.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class TraceRecord:
+    __slots__ = ("id", "root", "profile")
+
+    def __init__(self, trace_id: str, root: Span, profile: Optional[str] = None):
+        self.id = trace_id
+        self.root = root
+        self.profile = profile
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"traceId": self.id, "hasProfile": self.profile is not None, "root": self.root.to_dict()}
+
+
+class TraceStore:
+    """Bounded store of recently completed traces"""
+
+    def __init__(self, max_size: int = TRACE_HISTORY_SIZE):
+        self.max_size = max_size
+        self._records: "OrderedDict[str, TraceRecord]" = OrderedDict()
+
+    def add(self, record: TraceRecord):
+        self._records[record.id] = record
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[TraceRecord]:
+        return self._records.get(trace_id)
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        records = list(self._records.values())[-limit:]
+        return [
+            {"traceId": r.id, "name": r.root.name, "durationMs": r.root.to_dict()["durationMs"]}
+            for r in reversed(records)
+        ]
+
+
+trace_store = TraceStore()
+
+
+def should_sample() -> bool:
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+@contextmanager
+def start_trace(name: str, profile: bool = False, **attributes):
+    """Start a root span (and optionally a profiler) for the current request"""
+    trace_id = uuid.uuid4().hex
+    root = Span(name, attributes)
+    token = _current_span.set(root)
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+
+    record = TraceRecord(trace_id, root)
+    try:
+        yield record
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        if profiler:
+            profiler.stop()
+            record.profile = profiler.folded()
+        trace_store.add(record)
@@ -1,8 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from './ui/select';
 import { Textarea } from './ui/textarea';
+import { Switch } from './ui/switch';
+import { Label } from './ui/label';
 import { Badge } from './ui/badge';
 import { Progress } from './ui/progress';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from './ui/tabs';
@@ -32,7 +34,10 @@ const ScriptGenerator = ({ trend, onBack }) => {
   const [selectedTemplate, setSelectedTemplate] = useState('');
   const [selectedTone, setSelectedTone] = useState('');
   const [customPrompt, setCustomPrompt] = useState('');
+  const [allowSimilar, setAllowSimilar] = useState(true);
   const [isGenerating, setIsGenerating] = useState(false);
+  // Last unfinished generate request, resent with the same idempotency key on retry
+  const pendingRequest = useRef(null);
   const [generatedContent, setGeneratedContent] = useState(null);
   const [progress, setProgress] = useState(0);
   const [error, setError] = useState(null);
@@ -90,15 +95,32 @@ const ScriptGenerator = ({ trend, onBack }) => {
         });
       }, 1000);
 
-      const requestData = {
-        trend_id: trend.id,
-        template_id: selectedTemplate,
-        tone: selectedTone,
-        custom_prompt: customPrompt.trim() || null,
-        session_id: `script_gen_${Date.now()}`
-      };
+      const customPromptValue = customPrompt.trim() || null;
+      const pending = pendingRequest.current;
+      const isRetry = pending
+        && pending.data.trend_id === trend.id
+        && pending.data.template_id === selectedTemplate
+        && pending.data.tone === selectedTone
+        && pending.data.custom_prompt === customPromptValue
+        && pending.data.allow_similar === allowSimilar;
 
-      const response = await apiService.generateContent(requestData);
+      if (!isRetry) {
+        pendingRequest.current = {
+          key: window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`,
+          data: {
+            trend_id: trend.id,
+            template_id: selectedTemplate,
+            tone: selectedTone,
+            custom_prompt: customPromptValue,
+            allow_similar: allowSimilar,
+            session_id: `script_gen_${Date.now()}`
+          }
+        };
+      }
+      const { key, data: requestData } = pendingRequest.current;
+
+      const response = await apiService.generateContent(requestData, key);
+      pendingRequest.current = null;
       
       clearInterval(progressInterval);
       setProgress(100);
@@ -473,6 +495,16 @@ const ScriptGenerator = ({ trend, onBack }) => {
                     onChange={(e) => setCustomPrompt(e.target.value)}
                     className="min-h-[100px]"
                   />
+                  <div className="flex items-center justify-between mt-4">
+                    <Label htmlFor="allow-similar" className="text-sm text-gray-600">
+                      Reuse a recent matching script when available (faster)
+                    </Label>
+                    <Switch
+                      id="allow-similar"
+                      checked={allowSimilar}
+                      onCheckedChange={setAllowSimilar}
+                    />
+                  </div>
                 </CardContent>
               </Card>
             </div>
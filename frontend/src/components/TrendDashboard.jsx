@@ -23,11 +23,13 @@ const TrendDashboard = ({ onTrendSelect }) => {
     averageScore: 0,
     platforms: 4
   });
+  const [facets, setFacets] = useState(null);
 
   // Load initial data
   useEffect(() => {
     loadTrends();
     loadStats();
+    loadFacets();
   }, []);
 
   // Filter trends when search or filters change
@@ -46,7 +48,8 @@ const TrendDashboard = ({ onTrendSelect }) => {
 
       const params = {
         limit: 20,
-        page: 1
+        page: 1,
+        view: 'summary'
       };
 
       if (searchTerm.trim()) {
@@ -89,6 +92,20 @@ const TrendDashboard = ({ onTrendSelect }) => {
     }
   };
 
+  const loadFacets = async () => {
+    try {
+      setFacets(await apiService.getTrendFacets());
+    } catch (err) {
+      console.error('Error loading trend facets:', err);
+      // Filters still work without counts
+    }
+  };
+
+  // Filter label with its trend count, once facets have loaded
+  const withCount = (label, counts, key) => (
+    facets ? `${label} (${counts?.[key] ?? 0})` : label
+  );
+
   const getVelocityIcon = (velocity) => {
     switch (velocity) {
       case 'Exploding': return <Zap className="w-4 h-4 text-red-500" />;
@@ -188,13 +205,13 @@ const TrendDashboard = ({ onTrendSelect }) => {
                   <SelectValue placeholder="Category" />
                 </SelectTrigger>
                 <SelectContent>
-                  <SelectItem value="all">All Categories</SelectItem>
-                  <SelectItem value="technology">Technology</SelectItem>
-                  <SelectItem value="business">Business</SelectItem>
-                  <SelectItem value="lifestyle">Lifestyle</SelectItem>
-                  <SelectItem value="health">Health</SelectItem>
-                  <SelectItem value="finance">Finance</SelectItem>
-                  <SelectItem value="food">Food</SelectItem>
+                  <SelectItem value="all">{withCount('All Categories', facets, 'total')}</SelectItem>
+                  <SelectItem value="technology">{withCount('Technology', facets?.categories, 'technology')}</SelectItem>
+                  <SelectItem value="business">{withCount('Business', facets?.categories, 'business')}</SelectItem>
+                  <SelectItem value="lifestyle">{withCount('Lifestyle', facets?.categories, 'lifestyle')}</SelectItem>
+                  <SelectItem value="health">{withCount('Health', facets?.categories, 'health')}</SelectItem>
+                  <SelectItem value="finance">{withCount('Finance', facets?.categories, 'finance')}</SelectItem>
+                  <SelectItem value="food">{withCount('Food', facets?.categories, 'food')}</SelectItem>
                 </SelectContent>
               </Select>
               
@@ -203,11 +220,11 @@ const TrendDashboard = ({ onTrendSelect }) => {
                   <SelectValue placeholder="Platform" />
                 </SelectTrigger>
                 <SelectContent>
-                  <SelectItem value="all">All Platforms</SelectItem>
-                  <SelectItem value="twitter">Twitter/X</SelectItem>
-                  <SelectItem value="youtube">YouTube</SelectItem>
-                  <SelectItem value="reddit">Reddit</SelectItem>
-                  <SelectItem value="tiktok">TikTok</SelectItem>
+                  <SelectItem value="all">{withCount('All Platforms', facets, 'total')}</SelectItem>
+                  <SelectItem value="twitter">{withCount('Twitter/X', facets?.platforms, 'twitter')}</SelectItem>
+                  <SelectItem value="youtube">{withCount('YouTube', facets?.platforms, 'youtube')}</SelectItem>
+                  <SelectItem value="reddit">{withCount('Reddit', facets?.platforms, 'reddit')}</SelectItem>
+                  <SelectItem value="tiktok">{withCount('TikTok', facets?.platforms, 'tiktok')}</SelectItem>
                 </SelectContent>
               </Select>
               
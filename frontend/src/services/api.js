@@ -69,6 +69,9 @@ class ApiService {
       if (params.page) {
         queryParams.append('page', params.page);
       }
+      if (params.view) {
+        queryParams.append('view', params.view);
+      }
 
       const url = queryParams.toString() ? `/trends?${queryParams.toString()}` : '/trends';
       const response = await api.get(url);
@@ -84,6 +87,22 @@ class ApiService {
     }
   }
 
+  // Get trend counts per category, platform and score bucket
+  async getTrendFacets() {
+    try {
+      const response = await api.get('/trends/facets');
+      
+      if (response.data.success) {
+        return response.data.data;
+      } else {
+        throw new Error(response.data.message || 'Failed to fetch trend facets');
+      }
+    } catch (error) {
+      console.error('Error fetching trend facets:', error);
+      throw error;
+    }
+  }
+
   // Get specific trend by ID
   async getTrendById(trendId) {
     try {
@@ -100,10 +119,11 @@ class ApiService {
     }
   }
 
-  // Generate content script
-  async generateContent(requestData) {
+  // Generate content script; retries with the same idempotency key reuse the first attempt
+  async generateContent(requestData, idempotencyKey = null) {
     try {
-      const response = await api.post('/generate-content', requestData);
+      const config = idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : {};
+      const response = await api.post('/generate-content', requestData, config);
       
       if (response.data.success) {
         return response.data.data;
@@ -189,6 +209,7 @@ export default apiService;
 export const {
   healthCheck,
   getTrendingTopics,
+  getTrendFacets,
   getTrendById,
   generateContent,
   getContentTemplates,
@@ -0,0 +1,261 @@
+"""Offline load benchmarks for the TrendScript API.
+
+Runs the FastAPI app in-process with a stub LLM and an in-memory Mongo
+stand-in (mongomock-motor), measures throughput and latency percentiles per
+endpoint and concurrency level, writes JSON results and compares them with a
+stored baseline.
+
+    python -m tests.benchmarks.harness --concurrency 1,8,32 --requests 200
+
+The committed `baseline.json` backs the regression gate in
+`test_benchmarks.py` (RUN_BENCHMARKS=1) and must be recorded with the gate's
+settings; re-record it on the CI machine after an intended change:
+
+    python -m tests.benchmarks.harness --concurrency 1,8 --requests 50 --latency-ms 10 --runs 10 --update-baseline
+
+With several runs the baseline keeps the slowest p99 and lowest throughput
+seen, so run-to-run noise is not reported as a regression.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import platform
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import stub_llm
+
+BENCHMARK_DIR = Path(__file__).parent
+BACKEND_DIR = BENCHMARK_DIR.parent.parent / "backend"
+DEFAULT_RESULTS = BENCHMARK_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# p99 slowdowns smaller than this are scheduler noise on sub-10ms endpoints
+MIN_P99_REGRESSION_MS = 5.0
+
+# Settings of the regression gate; baseline.json is recorded with these
+GATE_CONCURRENCY = [1, 8]
+GATE_REQUESTS = 50
+GATE_LATENCY_MS = 10.0
+
+Scenario = Callable[[Any], Awaitable[Any]]
+
+
+def load_app(median_latency: float = 0.05, latency_sigma: float = 0.5, failure_rate: float = 0.0, seed: Optional[int] = 1):
+    """Import the backend app wired to the stub LLM and an in-memory Mongo"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+    # Measure the LLM path itself, not the persistent response cache
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    # All benchmark traffic comes from one client; don't rate limit it
+    os.environ.setdefault("USER_GENERATION_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("USER_GENERATION_BURST", "1000000")
+    stub_llm.install(median_latency, latency_sigma, failure_rate, seed)
+
+    import database
+    database.database.client = AsyncMongoMockClient()
+    database.database.database = database.database.client["trendscript_benchmark"]
+
+    import server
+    return server.app
+
+
+def build_scenarios() -> Dict[str, Scenario]:
+    """Requests exercised by the benchmark, keyed by a stable name"""
+
+    async def trends(client):
+        return await client.get("/api/trends", params={"limit": 20})
+
+    async def trend_by_id(client):
+        return await client.get(f"/api/trends/{uuid.uuid4()}")
+
+    async def stats(client):
+        return await client.get("/api/stats")
+
+    async def generate_content(client):
+        return await client.post("/api/generate-content", json={
+            "trend_id": str(uuid.uuid4()),
+            "template_id": "youtube-explainer",
+            "tone": "professional",
+            "allow_similar": False
+        })
+
+    return {
+        "GET /api/trends": trends,
+        "GET /api/trends/{id}": trend_by_id,
+        "GET /api/stats": stats,
+        "POST /api/generate-content": generate_content,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client, scenario: Scenario, concurrency: int, total_requests: int) -> Dict[str, float]:
+    """Fire `total_requests` requests from `concurrency` workers and summarize latencies"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total_requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await scenario(client)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def run_benchmarks(
+    app,
+    concurrency_levels: List[int],
+    total_requests: int,
+    scenario_names: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """Run every scenario at every concurrency level"""
+    import httpx
+
+    scenarios = build_scenarios()
+    if scenario_names:
+        scenarios = {name: scenarios[name] for name in scenario_names}
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, scenario in scenarios.items():
+            # Warm up code paths and caches before measuring
+            await scenario(client)
+            for concurrency in concurrency_levels:
+                results[f"{name}@c{concurrency}"] = await run_scenario(client, scenario, concurrency, total_requests)
+    return results
+
+
+def merge_runs(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Worst result per key across runs: highest latencies and errors, lowest throughput"""
+    merged: Dict[str, Dict[str, float]] = {}
+    for results in runs:
+        for key, summary in results.items():
+            current = merged.get(key)
+            if current is None:
+                merged[key] = dict(summary)
+                continue
+            for field, value in summary.items():
+                if field == "throughput_rps":
+                    current[field] = min(current[field], value)
+                else:
+                    current[field] = max(current[field], value)
+    return merged
+
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """Return a description of every result that regressed beyond the threshold"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if (
+            previous["p99_ms"]
+            and current["p99_ms"] > previous["p99_ms"] * (1 + threshold)
+            and current["p99_ms"] - previous["p99_ms"] >= MIN_P99_REGRESSION_MS
+        ):
+            regressions.append(f"{key}: p99 {current['p99_ms']}ms vs baseline {previous['p99_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {current['throughput_rps']} rps vs baseline {previous['throughput_rps']} rps"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{key}: {current['errors']} errors vs baseline {previous['errors']}")
+    return regressions
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "concurrency": args.concurrency,
+        "requests_per_level": args.requests,
+        "runs": args.runs,
+        "llm_median_latency_ms": args.latency_ms,
+        "llm_failure_rate": args.failure_rate,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run offline TrendScript API benchmarks")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--scenario", action="append", help="Limit to a scenario (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median stub LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal sigma of stub LLM latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability a stub LLM call fails")
+    parser.add_argument("--runs", type=int, default=1, help="Repeat the benchmark and keep the worst result")
+    parser.add_argument("--output", type=Path, default=DEFAULT_RESULTS, help="Where to write results JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with these results")
+    args = parser.parse_args(argv)
+
+    app = load_app(args.latency_ms / 1000, args.latency_sigma, args.failure_rate)
+    concurrency_levels = [int(level) for level in args.concurrency.split(",") if level]
+    runs = [asyncio.run(run_benchmarks(app, concurrency_levels, args.requests, args.scenario)) for _ in range(args.runs)]
+    results = merge_runs(runs)
+
+    report = {"meta": _metadata(args), "results": results}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+
+    for key, summary in results.items():
+        print(f"{key:40} {summary['throughput_rps']:>9} rps  p50 {summary['p50_ms']:>9}ms  p99 {summary['p99_ms']:>9}ms")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Stand-in for `emergentintegrations.llm.chat` with configurable latency and failures"""
+import sys
+import json
+import types
+import random
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+ANALYSIS_RESPONSE = {
+    "contentScore": 86,
+    "trendVelocity": "Rising Fast",
+    "keyInsights": ["Search interest doubled this week", "Creators are early", "Strong comment engagement"],
+    "suggestedAngles": ["Beginner walkthrough", "Myths vs facts", "Industry outlook"],
+    "category": "Technology"
+}
+
+CONTENT_RESPONSE = {
+    "title": "Benchmark Script",
+    "hook": "Here is why this matters right now.",
+    "outline": [
+        {"section": "Hook", "duration": "0:00 - 0:30", "content": ["Point 1", "Point 2"]},
+        {"section": "Main Content", "duration": "0:30 - 8:00", "content": ["Point 1", "Point 2", "Point 3"]},
+        {"section": "Call to Action", "duration": "8:00 - 9:00", "content": ["Subscribe"]}
+    ],
+    "keyPoints": ["Key point 1", "Key point 2", "Key point 3"],
+    "seoKeywords": ["keyword1", "keyword2", "keyword3"],
+    "hashtags": ["#Benchmark", "#Trends"],
+    "estimatedViews": "10K - 25K",
+    "difficulty": "Beginner-friendly"
+}
+
+
+@dataclass
+class StubLlmConfig:
+    """Latency is drawn from a lognormal distribution around `median_latency` seconds"""
+    median_latency: float = 0.05
+    latency_sigma: float = 0.5
+    failure_rate: float = 0.0
+    seed: Optional[int] = None
+    calls: List[Tuple[str, str, Optional[int]]] = field(default_factory=list)
+    # Returned, in order, before the canned responses
+    queued_responses: List[str] = field(default_factory=list)
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.median_latency <= 0:
+            return 0.0
+        return self.median_latency * rng.lognormvariate(0, self.latency_sigma)
+
+
+config = StubLlmConfig()
+_rng = random.Random()
+
+
+class UserMessage:
+    def __init__(self, text: str, file_contents=None):
+        self.text = text
+        self.file_contents = file_contents
+
+
+class LlmChat:
+    def __init__(self, api_key: str, session_id: str, system_message: str = ""):
+        self.api_key = api_key
+        self.session_id = session_id
+        self.system_message = system_message
+        self.provider = "openai"
+        self.model = "gpt-4o"
+        self.max_tokens: Optional[int] = None
+
+    def with_model(self, provider: str, model: str) -> "LlmChat":
+        self.provider = provider
+        self.model = model
+        return self
+
+    def with_max_tokens(self, max_tokens: int) -> "LlmChat":
+        self.max_tokens = max_tokens
+        return self
+
+    async def send_message(self, user_message: UserMessage) -> str:
+        config.calls.append((self.model, self.session_id, self.max_tokens))
+        await asyncio.sleep(config.sample_latency(_rng))
+        if config.failure_rate and _rng.random() < config.failure_rate:
+            raise RuntimeError("Stub LLM failure")
+        if config.queued_responses:
+            return config.queued_responses.pop(0)
+
+        if "Analyze this trending topic" in user_message.text:
+            return json.dumps(ANALYSIS_RESPONSE)
+        return json.dumps(CONTENT_RESPONSE)
+
+
+def install(median_latency: float = 0.05, latency_sigma: float = 0.5, failure_rate: float = 0.0, seed: Optional[int] = None):
+    """Register the stub as `emergentintegrations.llm.chat` before the app is imported"""
+    config.median_latency = median_latency
+    config.latency_sigma = latency_sigma
+    config.failure_rate = failure_rate
+    config.seed = seed
+    config.calls.clear()
+    config.queued_responses.clear()
+    _rng.seed(seed)
+
+    module = types.ModuleType("emergentintegrations.llm.chat")
+    module.LlmChat = LlmChat
+    module.UserMessage = UserMessage
+
+    package = sys.modules.setdefault("emergentintegrations", types.ModuleType("emergentintegrations"))
+    llm_package = sys.modules.setdefault("emergentintegrations.llm", types.ModuleType("emergentintegrations.llm"))
+    package.llm = llm_package
+    llm_package.chat = module
+    sys.modules["emergentintegrations.llm.chat"] = module
+    return config
@@ -0,0 +1,46 @@
+import os
+import json
+import asyncio
+
+import pytest
+
+from tests.benchmarks import harness
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert harness.percentile(values, 50) == 50.0
+    assert harness.percentile(values, 99) == 99.0
+    assert harness.percentile([], 99) == 0.0
+
+
+def test_compare_with_baseline_flags_regressions():
+    baseline = {"GET /api/stats@c8": {"p99_ms": 10.0, "throughput_rps": 500.0, "errors": 0}}
+
+    within = {"GET /api/stats@c8": {"p99_ms": 12.0, "throughput_rps": 450.0, "errors": 0}}
+    assert harness.compare_with_baseline(within, baseline, threshold=0.25) == []
+
+    slower = {"GET /api/stats@c8": {"p99_ms": 20.0, "throughput_rps": 200.0, "errors": 3}}
+    assert len(harness.compare_with_baseline(slower, baseline, threshold=0.25)) == 3
+
+
+def test_merge_runs_keeps_worst_result():
+    runs = [
+        {"GET /api/stats@c8": {"p99_ms": 10.0, "throughput_rps": 500.0, "errors": 0}},
+        {"GET /api/stats@c8": {"p99_ms": 14.0, "throughput_rps": 520.0, "errors": 1}},
+    ]
+    assert harness.merge_runs(runs) == {"GET /api/stats@c8": {"p99_ms": 14.0, "throughput_rps": 500.0, "errors": 1}}
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run load benchmarks")
+def test_no_regression_against_baseline():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    pytest.importorskip("mongomock_motor")
+
+    app = harness.load_app(median_latency=harness.GATE_LATENCY_MS / 1000)
+    results = asyncio.run(harness.run_benchmarks(app, harness.GATE_CONCURRENCY, total_requests=harness.GATE_REQUESTS))
+    assert all(summary["errors"] == 0 for summary in results.values())
+
+    baseline = json.loads(harness.DEFAULT_BASELINE.read_text())["results"]
+    assert harness.compare_with_baseline(results, baseline) == []
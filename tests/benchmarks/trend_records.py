@@ -0,0 +1,102 @@
+"""Micro-benchmark: pydantic `Trend` models vs internal `TrendRecord`s.
+
+Measures per-trend memory of a snapshot and the CPU cost of the two hot
+operations: installing a snapshot payload and serializing the list view.
+
+    python -m tests.benchmarks.trend_records --trends 1000
+"""
+import sys
+import json
+import timeit
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from models import Trend, TrendRecord, TREND_SUMMARY_FIELDS, trend_field_include  # noqa: E402
+
+PLATFORMS = ["twitter", "youtube", "reddit", "tiktok"]
+CATEGORIES = ["Technology", "Business", "Lifestyle", "Finance", "Health", "Food"]
+
+
+def snapshot_payload(count: int) -> List[Dict[str, Any]]:
+    """Trend dicts as they arrive in a snapshot payload (after a JSON round trip)"""
+    trends = []
+    for i in range(count):
+        trend = Trend(
+            topic=f"Trending Topic {i}",
+            platform=PLATFORMS[i % len(PLATFORMS)],
+            hashtags=[f"#Tag{i}", "#Trending", "#ContentCreation", "#2025Trends", "#Viral"],
+            contentScore=60 + i % 40,
+            trendVelocity="Rising Fast",
+            engagement={
+                "twitter": {"mentions": 40000 + i, "posts": 12000, "sentiment": 0.8},
+                "youtube": {"videos": 230, "totalViews": 890000 + i, "avgViews": 3800},
+                "reddit": {"posts": 89, "upvotes": 15600, "comments": 2400},
+                "tiktok": {"videos": 156, "totalViews": 456000, "engagement": 0.12},
+            },
+            keyInsights=[f"Growing interest in Trending Topic {i}", "Popular on twitter platform", "Good potential for content creation"],
+            suggestedAngles=[f"Beginner's guide to Trending Topic {i}", f"Latest trends in Trending Topic {i}", "How it affects you"],
+            timeframe="2h ago",
+            category=CATEGORIES[i % len(CATEGORIES)]
+        )
+        trends.append(trend.dict())
+    return json.loads(json.dumps(trends, default=lambda value: value.isoformat()))
+
+
+def _memory_per_item(build: Callable[[], List[Any]]) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / len(items)
+
+
+def _microseconds_per_item(func: Callable[[], Any], count: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat)) / count * 1e6
+
+
+def run(count: int = 1000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    payload = snapshot_payload(count)
+    include = trend_field_include(TREND_SUMMARY_FIELDS)
+    models = [Trend(**data) for data in payload]
+    records = [TrendRecord.from_dict(data) for data in payload]
+
+    return {
+        "model": {
+            "bytes_per_trend": _memory_per_item(lambda: [Trend(**data) for data in payload]),
+            "build_us": _microseconds_per_item(lambda: [Trend(**data) for data in payload], count, repeat),
+            "serialize_us": _microseconds_per_item(lambda: [t.dict(include=include) for t in models], count, repeat),
+        },
+        "record": {
+            "bytes_per_trend": _memory_per_item(lambda: [TrendRecord.from_dict(data) for data in payload]),
+            "build_us": _microseconds_per_item(lambda: [TrendRecord.from_dict(data) for data in payload], count, repeat),
+            "serialize_us": _microseconds_per_item(lambda: [r.to_dict(include=include) for r in records], count, repeat),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare Trend models with TrendRecords")
+    parser.add_argument("--trends", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    import warnings
+    warnings.simplefilter("ignore", DeprecationWarning)
+    results = run(args.trends, args.repeat)
+    print(f"{'':8} {'bytes/trend':>12} {'build µs':>10} {'serialize µs':>13}")
+    for name, result in results.items():
+        print(f"{name:8} {result['bytes_per_trend']:12.0f} {result['build_us']:10.2f} {result['serialize_us']:13.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
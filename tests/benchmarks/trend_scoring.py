@@ -0,0 +1,81 @@
+"""Micro-benchmark: scoring a trend snapshot with the local scoring model.
+
+Measures the per-snapshot cost of the three steps TrendService runs on
+every refresh: feature extraction, scoring and velocity labels.
+
+    python -m tests.benchmarks.trend_scoring --trends 5000
+"""
+import sys
+import random
+import timeit
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from models import EngagementMetrics, PlatformMetrics  # noqa: E402
+from services.trend_scoring import TrendScoringModel, engagement_features, timeframe_hours  # noqa: E402
+
+CATEGORIES = ["Technology", "Business", "Lifestyle", "Finance", "Health", "Food"]
+
+
+def snapshot(count: int, seed: int = 1):
+    """Engagements, timeframes, previous engagements and categories of a synthetic snapshot"""
+    rng = random.Random(seed)
+
+    def engagement() -> EngagementMetrics:
+        scale = rng.lognormvariate(0, 1)
+        return EngagementMetrics(
+            twitter=PlatformMetrics(mentions=int(45000 * scale), posts=int(12500 * scale), sentiment=rng.random()),
+            youtube=PlatformMetrics(videos=int(234 * scale), totalViews=int(890000 * scale), avgViews=int(3800 * scale)),
+            reddit=PlatformMetrics(posts=int(89 * scale), upvotes=int(15600 * scale), comments=int(2400 * scale)),
+            tiktok=PlatformMetrics(videos=int(156 * scale), totalViews=int(456000 * scale), engagement=rng.random() / 4),
+        )
+
+    engagements = [engagement() for _ in range(count)]
+    timeframes = [f"{rng.randint(1, 48)}h ago" for _ in range(count)]
+    previous = [engagement() if i % 2 else None for i in range(count)]
+    categories = [CATEGORIES[i % len(CATEGORIES)] for i in range(count)]
+    return engagements, timeframes, previous, categories
+
+
+def run(count: int = 5000, repeat: int = 5) -> Dict[str, float]:
+    """Best-of-`repeat` milliseconds per snapshot for each step"""
+    engagements, timeframes, previous, categories = snapshot(count)
+    model = TrendScoringModel()
+
+    def features():
+        return engagement_features(engagements, [timeframe_hours(t) for t in timeframes], previous)
+
+    matrix = features()
+
+    def best_ms(func) -> float:
+        return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+    results = {
+        "features_ms": best_ms(features),
+        "score_ms": best_ms(lambda: model.score(matrix, categories)),
+        "labels_ms": best_ms(lambda: model.velocity_labels(matrix)),
+    }
+    results["total_ms"] = sum(results.values())
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time scoring a trend snapshot")
+    parser.add_argument("--trends", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.trends, args.repeat)
+    print(f"{args.trends} trends")
+    for name, value in results.items():
+        print(f"  {name:12} {value:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Backend modules import each other as top-level modules (`from models import ...`)
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
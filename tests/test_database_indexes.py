@@ -0,0 +1,59 @@
+import os
+import uuid
+import asyncio
+
+import pytest
+
+motor_asyncio = pytest.importorskip("motor.motor_asyncio")
+
+import database
+
+MONGO_URL = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017")
+
+
+def _stages(plan):
+    """Flatten the stage names of a query plan"""
+    stages = [plan["stage"]]
+    for child in plan.get("inputStages", []) + ([plan["inputStage"]] if "inputStage" in plan else []):
+        stages.extend(_stages(child))
+    return stages
+
+
+async def _winning_plan_stages(**query):
+    client = motor_asyncio.AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        pytest.skip(f"MongoDB not reachable at {MONGO_URL}")
+
+    db_name = f"trendscript_test_{uuid.uuid4().hex[:8]}"
+    database.database.client = client
+    database.database.database = client[db_name]
+    try:
+        await database.create_indexes()
+        await client[db_name].trends.insert_many([
+            {"id": str(uuid.uuid4()), "topic": f"Topic {i}", "category": ["Technology", "Business"][i % 2],
+             "platform": ["twitter", "youtube", "reddit"][i % 3], "contentScore": i}
+            for i in range(50)
+        ])
+        explain = await database.trends_cursor(client[db_name], **query).explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        # Slot-based engine plans nest the classic plan under "queryPlan"
+        return _stages(winning_plan.get("queryPlan", winning_plan))
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"category": "Technology"},
+    {"platform": "youtube"},
+    {"category": "Technology", "platform": "youtube"},
+])
+def test_trend_list_queries_use_index_for_filter_and_sort(query):
+    stages = asyncio.run(_winning_plan_stages(**query))
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
+    # The sort on contentScore must come from the index, not an in-memory sort
+    assert "SORT" not in stages
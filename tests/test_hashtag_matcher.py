@@ -0,0 +1,41 @@
+from services.hashtag_matcher import HashtagMatcher, hashtag_matcher
+
+
+def test_keywords_match_whole_words_only():
+    assert "#AI" not in hashtag_matcher.generate("How to maintain focus", limit=20)
+    assert "#AI" not in hashtag_matcher.generate("What the CEO said today", limit=20)
+    assert "#AI" in hashtag_matcher.generate("#AI, explained", limit=20)
+    assert "#AI" in hashtag_matcher.generate("Why AI agents are everywhere", limit=20)
+
+
+def test_phrases_match_across_punctuation():
+    matcher = HashtagMatcher([(("artificial intelligence",), ("#AI",))])
+
+    assert matcher.generate("Artificial  Intelligence: the basics") == ["#Artificial", "#Intelligence", "#Basics", "#AI"]
+    assert matcher.generate("Artificial insemination and intelligence") == [
+        "#Artificial", "#Insemination", "#Intelligence"
+    ]
+
+
+def test_hyphens_split_words_as_before():
+    # The original generator replaced hyphens with spaces before splitting
+    assert hashtag_matcher.generate("E-commerce trends", limit=20) == ["#Commerce", "#Trends"]
+    assert "#Tech" in hashtag_matcher.generate("Low-code tech stacks", limit=20)
+
+
+def test_hashtags_keep_rule_order_without_duplicates():
+    hashtags = hashtag_matcher.generate("Remote work for tech startups", limit=20)
+
+    assert hashtags == [
+        "#Remote", "#Work", "#Tech", "#Startups",
+        "#Business", "#Startup", "#Entrepreneurship",
+        "#Programming", "#Development",
+        "#RemoteWork", "#Productivity", "#WorkFromHome",
+    ]
+    assert len(hashtag_matcher.generate("Remote work for tech startups")) == 5
+
+
+def test_batch_matches_single_generation():
+    topics = ["AI in healthcare", "Remote work", "AI in healthcare"]
+
+    assert hashtag_matcher.generate_batch(topics) == {topic: hashtag_matcher.generate(topic) for topic in topics}
@@ -0,0 +1,94 @@
+import uuid
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mongomock_motor")
+httpx = pytest.importorskip("httpx")
+
+from tests.benchmarks import stub_llm  # noqa: E402
+from tests.benchmarks.harness import load_app  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = load_app(median_latency=0.3, latency_sigma=0.01)
+    import server
+    from services.llm_cache import LlmResponseCache
+    # Every generation must reach the (stub) LLM
+    server.get_ai_service().response_cache = LlmResponseCache(path=str(tmp_path / "llm_cache.sqlite3"), enabled=False)
+    return app
+
+
+def _client(app) -> "httpx.AsyncClient":
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=30)
+
+
+async def _body(client) -> dict:
+    """A generation request not seen before, counting LLM calls from here"""
+    trend_id = (await client.get("/api/trends", params={"limit": 1})).json()["data"]["trends"][0]["id"]
+    stub_llm.config.calls.clear()
+    return {"trend_id": trend_id, "template_id": "blog-post", "tone": "casual", "custom_prompt": uuid.uuid4().hex}
+
+
+def test_repeated_key_replays_the_stored_response(app):
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+
+    async def run():
+        async with _client(app) as client:
+            body = await _body(client)
+            first = await client.post("/api/generate-content", json=body, headers=key)
+            second = await client.post("/api/generate-content", json=body, headers=key)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == second.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json()["data"] == first.json()["data"]
+    assert len(stub_llm.config.calls) == 1
+
+
+def test_reusing_a_key_for_a_different_body_is_rejected(app):
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+
+    async def run():
+        async with _client(app) as client:
+            body = await _body(client)
+            first = await client.post("/api/generate-content", json=body, headers=key)
+            other = await client.post("/api/generate-content", json={**body, "tone": "humorous"}, headers=key)
+        return first, other
+
+    first, other = asyncio.run(run())
+    assert first.status_code == 200
+    assert other.status_code == 422
+    assert len(stub_llm.config.calls) == 1
+
+
+def test_generation_outlives_a_disconnected_client(app):
+    import database
+    from admission import generation_admission
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+
+    async def run():
+        async with _client(app) as client:
+            body = await _body(client)
+            first = asyncio.create_task(client.post("/api/generate-content", json=body, headers=key))
+            await asyncio.sleep(0.1)
+            first.cancel()
+            await asyncio.sleep(0.05)
+            # The detached generation still holds its admission slot
+            in_flight_after_disconnect = generation_admission.in_flight
+
+            retry = await client.post("/api/generate-content", json=body, headers=key)
+        stored = await database.database.database.generated_content.find_one({"id": retry.json()["data"]["id"]})
+        return in_flight_after_disconnect, retry, stored
+
+    in_flight_after_disconnect, retry, stored = asyncio.run(run())
+    assert in_flight_after_disconnect == 1
+    assert generation_admission.in_flight == 0
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert stored is not None
+    assert len(stub_llm.config.calls) == 1
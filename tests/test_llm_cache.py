@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from tests.benchmarks import stub_llm
+
+pytest.importorskip("pydantic")
+stub_llm.install(median_latency=0)
+
+from models import ContentGenerationRequest, Trend  # noqa: E402
+from services.ai_service import AIService, InvalidResponseError  # noqa: E402
+from services.llm_cache import LlmResponseCache  # noqa: E402
+
+
+def _service(tmp_path) -> AIService:
+    service = AIService()
+    service.response_cache = LlmResponseCache(path=str(tmp_path / "llm_cache.sqlite3"), enabled=True, replay_mode=False)
+    return service
+
+
+def test_responses_are_replayed_from_cache(tmp_path):
+    service = _service(tmp_path)
+    stub_llm.config.calls.clear()
+
+    first = asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+    second = asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+
+    assert first == second
+    assert len(stub_llm.config.calls) == 1
+
+
+def test_malformed_responses_are_not_cached(tmp_path):
+    service = _service(tmp_path)
+    stub_llm.config.calls.clear()
+    stub_llm.config.queued_responses.append('{"keyInsights": ["cut off')
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+    insights = asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+
+    assert insights["keyInsights"]
+    assert len(stub_llm.config.calls) == 2
+
+
+def test_unparseable_scripts_fall_back_without_caching(tmp_path):
+    service = _service(tmp_path)
+    trend = Trend(topic="AI-Powered Code Reviews", platform="twitter", contentScore=90,
+                  trendVelocity="Rising Fast", timeframe="2h ago", category="Technology")
+    request = ContentGenerationRequest(trend_id=trend.id, template_id="short-form", tone="casual")
+    stub_llm.config.calls.clear()
+
+    stub_llm.config.queued_responses.append("Sorry, I can't help with that.")
+    with pytest.raises(InvalidResponseError):
+        asyncio.run(service.pregenerate_content(trend, "short-form", "casual"))
+
+    stub_llm.config.queued_responses.append('{"title": "cut off')
+    fallback = asyncio.run(service.generate_content_script(trend, request, "user"))
+    generated = asyncio.run(service.generate_content_script(trend, request, "user"))
+
+    assert fallback.title != generated.title == "Benchmark Script"
+    assert generated.reusedFrom is None
+    assert len(stub_llm.config.calls) == 3
+
+
+def test_opting_out_of_reuse_skips_the_response_cache(tmp_path):
+    service = _service(tmp_path)
+    trend = Trend(topic="AI-Powered Code Reviews", platform="twitter", contentScore=90,
+                  trendVelocity="Rising Fast", timeframe="2h ago", category="Technology")
+    stub_llm.config.calls.clear()
+
+    for allow_similar in (False, False, True):
+        request = ContentGenerationRequest(trend_id=trend.id, template_id="short-form", tone="casual",
+                                           allow_similar=allow_similar)
+        asyncio.run(service._generate_with_llm(trend, request, "user", "session"))
+
+    # Fresh generations still refresh the cache for requests that allow reuse
+    assert len(stub_llm.config.calls) == 2
@@ -0,0 +1,38 @@
+import os
+
+from metrics import Counter, Histogram, render_metrics, write_worker_file
+
+
+def test_multiprocess_render_sums_worker_files(tmp_path, monkeypatch):
+    monkeypatch.setattr("metrics._registry", [])
+    requests = Counter("test_requests_total", "Requests", ("route",))
+    latency = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    # Another worker's file, written as it would be by that process
+    requests.inc("/a", amount=3)
+    latency.observe(0.05)
+    write_worker_file(str(tmp_path))
+    os.replace(tmp_path / f"metrics-{os.getpid()}.json", tmp_path / "metrics-1.json")
+
+    # This worker
+    requests._values.clear()
+    latency._values.clear()
+    requests.inc("/a")
+    requests.inc("/b", amount=2)
+    latency.observe(0.5)
+
+    text = render_metrics(str(tmp_path))
+
+    assert 'test_requests_total{route="/a"} 4' in text
+    assert 'test_requests_total{route="/b"} 2' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["metrics-1.json", f"metrics-{os.getpid()}.json"]
+
+
+def test_single_process_render_uses_local_values(monkeypatch):
+    monkeypatch.setattr("metrics._registry", [])
+    Counter("test_local_total", "Local").inc()
+
+    assert "test_local_total 1" in render_metrics()
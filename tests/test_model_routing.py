@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from tests.benchmarks import stub_llm
+
+pytest.importorskip("pydantic")
+stub_llm.install(median_latency=0)
+
+from models import ContentGenerationRequest, Trend  # noqa: E402
+from services.ai_service import AIService  # noqa: E402
+from services.llm_cache import LlmResponseCache  # noqa: E402
+from services.model_router import LLM_ROUTING_DECISIONS, LLM_TRUNCATIONS, ModelRouter, Route, RoutePolicy  # noqa: E402
+
+
+def _trend() -> Trend:
+    return Trend(
+        topic="AI-Powered Code Reviews",
+        platform="twitter",
+        contentScore=90,
+        trendVelocity="Rising Fast",
+        timeframe="2h ago",
+        category="Technology"
+    )
+
+
+def _service() -> AIService:
+    service = AIService()
+    service.response_cache = LlmResponseCache(enabled=False)
+    return service
+
+
+def _generate(service: AIService, template_id: str):
+    trend = _trend()
+    request = ContentGenerationRequest(trend_id=trend.id, template_id=template_id, tone="casual")
+    return asyncio.run(service._generate_with_llm(trend, request, "user", f"session-{template_id}"))
+
+
+def test_templates_route_to_their_tier():
+    service = _service()
+    stub_llm.config.calls.clear()
+
+    _generate(service, "short-form")
+    _generate(service, "youtube-explainer")
+    _generate(service, "unknown-template")
+
+    assert stub_llm.config.calls == [
+        ("gpt-4o-mini", "session-short-form", 1024),
+        ("gpt-4o", "session-youtube-explainer", 4096),
+        ("gpt-4o", "session-unknown-template", 4096),
+    ]
+
+
+def test_trend_insights_use_fast_tier():
+    service = _service()
+    stub_llm.config.calls.clear()
+
+    insights = asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+
+    assert insights["keyInsights"]
+    assert stub_llm.config.calls == [("gpt-4o-mini", "trend_analysis_Topic", 512)]
+
+
+def test_routing_decisions_are_counted():
+    before = LLM_ROUTING_DECISIONS.value("content", "short-form", "gpt-4o-mini")
+    unknown_before = LLM_ROUTING_DECISIONS.value("content", "-", "gpt-4o")
+
+    router = ModelRouter()
+    router.route("content", "short-form")
+    router.route("content", "not-a-template")
+
+    assert LLM_ROUTING_DECISIONS.value("content", "short-form", "gpt-4o-mini") == before + 1
+    assert LLM_ROUTING_DECISIONS.value("content", "-", "gpt-4o") == unknown_before + 1
+
+
+def test_limits_adapt_to_observed_output_sizes():
+    router = ModelRouter(min_samples=5)
+    route = router.route("content", "youtube-explainer")
+    assert route.max_tokens == 4096
+
+    for _ in range(5):
+        router.observe(route, 1800)
+    assert router.route("content", "youtube-explainer").max_tokens == 2250
+
+    # Small outputs never push the limit below the policy floor
+    small = ModelRouter(min_samples=5)
+    for _ in range(5):
+        small.observe(small.route("content", "short-form"), 50)
+    assert small.route("content", "short-form").max_tokens == 512
+
+
+def test_truncated_outputs_raise_the_limit():
+    router = ModelRouter(min_samples=1)
+    router.observe(router.route("content", "youtube-explainer"), 1000)
+    limited = router.route("content", "youtube-explainer")
+    assert limited.max_tokens == 1536
+
+    for _ in range(5):
+        router.observe(limited, limited.max_tokens)
+    assert router.route("content", "youtube-explainer").max_tokens >= 2 * limited.max_tokens
+
+
+def test_truncated_responses_are_not_replayed(tmp_path):
+    service = AIService()
+    service.response_cache = LlmResponseCache(path=str(tmp_path / "llm_cache.sqlite3"), enabled=True, replay_mode=False)
+    # Every stub analysis response reaches this limit
+    service.model_router = ModelRouter(table={("analysis", None): RoutePolicy("fast", 8, 8)})
+    before = LLM_TRUNCATIONS.value("analysis", "-")
+    stub_llm.config.calls.clear()
+
+    for _ in range(2):
+        asyncio.run(service.generate_trend_insights("Topic", {"topic": "Topic"}))
+
+    assert len(stub_llm.config.calls) == 2
+    assert LLM_TRUNCATIONS.value("analysis", "-") == before + 2
+
+
+def test_adaptive_limits_can_be_disabled():
+    router = ModelRouter(adaptive=False, min_samples=1)
+    router.observe(Route("content", "short-form", "openai", "gpt-4o-mini", 1024), 10)
+    assert router.route("content", "short-form").max_tokens == 1024
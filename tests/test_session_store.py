@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import database  # noqa: E402
+from models import ChatSession, ContentSection, GeneratedContent  # noqa: E402
+from services.prompt_builder import build_refinement_prompt  # noqa: E402
+from services.session_store import SESSION_MESSAGE_MAX_CHARS, SessionConflict, SessionStore  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    previous = database.database.client, database.database.database
+    database.database.client = mongomock_motor.AsyncMongoMockClient()
+    database.database.database = database.database.client["session_store_test"]
+    yield database.database.database
+    database.database.client, database.database.database = previous
+
+
+def _content(sections: int = 4) -> GeneratedContent:
+    return GeneratedContent(
+        id="content-1", user_id="user-1", session_id="session-1", trend_id="trend-1",
+        template_id="youtube-explainer", tone="casual",
+        title="Why everyone is talking about local AI models",
+        hook="Your laptop can now run a model that rivals last year's cloud giants.",
+        outline=[
+            ContentSection(section=f"Part {i}", duration=f"{i}:00 - {i + 1}:00",
+                           content=[f"Point {j} of part {i}, explained with an example" for j in range(3)])
+            for i in range(sections)
+        ],
+        keyPoints=["Cost", "Privacy"], seoKeywords=["local ai"], hashtags=["#AI"],
+        estimatedViews="10K - 25K", difficulty="Beginner-friendly"
+    )
+
+
+def test_save_over_a_newer_session_conflicts_and_reloads(db):
+    worker_a, worker_b = SessionStore(), SessionStore()
+
+    async def run():
+        await worker_a.create(_content())
+        stale = await worker_b.get("content-1")
+
+        session = await worker_a.get("content-1")
+        session.content = GeneratedContent(**{**session.content.dict(), "title": "Title from worker A"})
+        await worker_a.save(session)
+
+        stale.content = GeneratedContent(**{**stale.content.dict(), "hook": "Hook from worker B"})
+        with pytest.raises(SessionConflict):
+            await worker_b.save(stale)
+        return await worker_b.get("content-1")
+
+    reloaded = asyncio.run(run())
+    assert reloaded.version == 1
+    assert reloaded.content.title == "Title from worker A"
+    assert reloaded.content.hook != "Hook from worker B"
+
+
+def test_concurrent_requests_in_one_worker_do_not_share_a_session(db):
+    store = SessionStore()
+
+    async def run():
+        await store.create(_content())
+        first, second = await store.get("content-1"), await store.get("content-1")
+        assert first is not second
+
+        first.summary = "first"
+        await store.save(first)
+        second.summary = "second"
+        with pytest.raises(SessionConflict):
+            await store.save(second)
+        return await db.chat_sessions.find_one({"id": "content-1"})
+
+    stored = asyncio.run(run())
+    assert stored["summary"] == "first"
+    assert stored["version"] == 1
+
+
+def test_sessions_saved_before_versioning_can_be_updated(db):
+    store = SessionStore()
+
+    async def run():
+        legacy = _content()
+        await db.chat_sessions.insert_one({"id": legacy.id, "user_id": legacy.user_id, "content": legacy.dict(),
+                                           "summary": "", "messages": []})
+        session = await store.get(legacy.id)
+        session.summary = "updated"
+        await store.save(session)
+        return await db.chat_sessions.find_one({"id": legacy.id})
+
+    assert asyncio.run(run())["version"] == 1
+
+
+def test_append_keeps_recent_turns_and_folds_older_user_turns_into_summary():
+    store = SessionStore(max_messages=4, summary_max_chars=80)
+    session = _unsaved_session()
+
+    for i in range(6):
+        store.append(session, "user", f"instruction {i}", target="hook")
+        store.append(session, "assistant", f"reply {i}", target="hook")
+
+    assert [m["content"] for m in session.messages] == ["instruction 4", "reply 4", "instruction 5", "reply 5"]
+    assert "reply" not in session.summary
+    # Clipped from the front, keeping the most recent dropped turn
+    assert len(session.summary) <= 80
+    assert session.summary.startswith("...")
+    assert session.summary.endswith("hook: instruction 3")
+
+
+def test_append_clips_long_messages():
+    store = SessionStore()
+    session = _unsaved_session()
+
+    store.append(session, "assistant", "word " * 500)
+
+    assert len(session.messages[0]["content"]) <= SESSION_MESSAGE_MAX_CHARS
+    assert session.messages[0]["content"].endswith("...")
+
+
+def _unsaved_session() -> ChatSession:
+    return ChatSession(id="content-1", user_id="user-1", content=_content())
+
+
+@pytest.mark.parametrize("budget", [250, 400, 600])
+@pytest.mark.parametrize("target,section_index", [("title", None), ("hook", None), ("section", 2)])
+def test_refinement_prompt_stays_within_budget_for_long_sessions(target, section_index, budget):
+    store = SessionStore()
+    session = _unsaved_session()
+    for i in range(50):
+        store.append(session, "user", f"make part {i} punchier and add a statistic " * 8, target=target)
+        store.append(session, "assistant", "a rewritten paragraph with several sentences " * 20, target=target)
+
+    prompt = build_refinement_prompt(
+        session.content, target, section_index, "shorter please",
+        summary=session.summary, history=session.messages, token_budget=budget
+    )
+
+    assert prompt.prompt_tokens <= budget
+    assert prompt.trimmed_sections == ["Session History"]
+    assert "shorter please" in prompt.user_prompt
+    # History is dropped oldest first
+    if "**Earlier in this session**" in prompt.user_prompt:
+        assert session.messages[-1]["content"][:40] in prompt.user_prompt
+        assert "- earlier:" not in prompt.user_prompt
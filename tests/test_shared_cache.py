@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import database  # noqa: E402
+from services.shared_cache import SharedCache  # noqa: E402
+
+
+@pytest.fixture
+def collection():
+    previous = database.database.client, database.database.database
+    database.database.client = mongomock_motor.AsyncMongoMockClient()
+    database.database.database = database.database.client["shared_cache_test"]
+    yield database.database.database.shared_cache
+    database.database.client, database.database.database = previous
+
+
+def _past() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=5)
+
+
+def test_expired_value_is_not_left_to_the_ttl_monitor_while_computing(collection):
+    cache = SharedCache()
+    seen = {}
+
+    async def compute():
+        seen["doc"] = await collection.find_one({"_id": "key"})
+        return "new"
+
+    async def run():
+        await collection.insert_one({"_id": "key", "value": "old", "expires_at": _past()})
+        return await cache.get_or_compute("key", compute, 60)
+
+    assert asyncio.run(run()) == "new"
+    assert "value" not in seen["doc"]
+    assert seen["doc"]["expires_at"] == seen["doc"]["lock_until"] > datetime.utcnow()
+
+
+def test_failed_compute_leaves_no_document(collection):
+    async def compute():
+        raise RuntimeError("boom")
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await SharedCache().get_or_compute("key", compute, 60)
+        return await collection.find_one({"_id": "key"})
+
+    assert asyncio.run(run()) is None
+
+
+def test_live_values_are_never_leased(collection):
+    async def run():
+        await collection.insert_one({"_id": "key", "value": "live", "expires_at": datetime.utcnow() + timedelta(minutes=1)})
+        token = await SharedCache()._acquire(collection, "key")
+        return token, await collection.find_one({"_id": "key"})
+
+    token, doc = asyncio.run(run())
+    assert token is None
+    assert doc["value"] == "live"
+
+
+def test_expired_lease_holder_cannot_overwrite_the_new_holder(collection):
+    first = SharedCache(lock_seconds=0.1, poll_seconds=0.02)
+    second = SharedCache(lock_seconds=5, poll_seconds=0.02)
+
+    async def slow():
+        await asyncio.sleep(0.3)
+        return "stale"
+
+    async def fast():
+        await asyncio.sleep(0.1)
+        return "fresh"
+
+    async def run():
+        slow_task = asyncio.create_task(first.get_or_compute("key", slow, 60))
+        await asyncio.sleep(0.15)
+        fast_result = await second.get_or_compute("key", fast, 60)
+        await slow_task
+        return fast_result, await first.get("key")
+
+    assert asyncio.run(run()) == ("fresh", "fresh")
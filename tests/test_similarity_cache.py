@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from tests.benchmarks import stub_llm
+
+pytest.importorskip("pydantic")
+stub_llm.install(median_latency=0)
+
+from models import ContentGenerationRequest, GeneratedContent, Trend  # noqa: E402
+from services.ai_service import AIService  # noqa: E402
+from services.llm_cache import LlmResponseCache  # noqa: E402
+from services.similarity_cache import SimilarityCache, normalize_prompt  # noqa: E402
+
+KEY = ("trend-1", "youtube-explainer", "casual", "")
+
+
+def _content(prompt) -> GeneratedContent:
+    return GeneratedContent(
+        user_id="user", session_id="session", trend_id=KEY[0], template_id=KEY[1], tone=KEY[2],
+        custom_prompt=prompt, title="Title", hook="Hook", outline=[], keyPoints=[], seoKeywords=[],
+        hashtags=[], estimatedViews="1K - 5K", difficulty="Beginner"
+    )
+
+
+def _reused(cached_prompt, prompt) -> bool:
+    cache = SimilarityCache(enabled=True)
+    cache.store(KEY, cached_prompt, _content(cached_prompt))
+    return cache.lookup(KEY, prompt) is not None
+
+
+@pytest.mark.parametrize("cached_prompt, prompt", [
+    ("Focus on small businesses in Europe", "Focus on small businesses in Asia"),
+    ("Add a section about pricing", "Add a section about privacy"),
+    ("Make it more formal", "Make it less formal"),
+    ("Use examples with cats", "Use examples with dogs"),
+    ("Do not mention competitors", "Mention competitors"),
+    ("Make it punchier", None),
+])
+def test_prompts_that_mean_different_things_miss(cached_prompt, prompt):
+    assert not _reused(cached_prompt, prompt)
+
+
+@pytest.mark.parametrize("cached_prompt, prompt", [
+    ("Make it punchier", "punchy please"),
+    ("Focus on beginner examples", "Focus on examples for a beginner"),
+    (None, "   "),
+])
+def test_rewordings_of_the_same_request_hit(cached_prompt, prompt):
+    assert _reused(cached_prompt, prompt)
+
+
+def test_negations_and_comparatives_are_kept():
+    assert normalize_prompt("make it more formal") == "formal more"
+    assert normalize_prompt("do not mention it") == "do mention not"
+
+
+def test_lookups_stay_within_their_bucket():
+    cache = SimilarityCache(enabled=True)
+    cache.store(KEY, "Make it punchier", _content("Make it punchier"))
+
+    assert cache.lookup(("trend-2",) + KEY[1:], "Make it punchier") is None
+
+
+def test_prompted_scripts_are_only_reused_for_their_author():
+    service = AIService()
+    service.response_cache = LlmResponseCache(enabled=False)
+    service.similarity_cache = SimilarityCache(enabled=True)
+    trend = Trend(topic="AI-Powered Code Reviews", platform="twitter", contentScore=90,
+                  trendVelocity="Rising Fast", timeframe="2h ago", category="Technology")
+
+    def generate(user_id, custom_prompt):
+        request = ContentGenerationRequest(trend_id=trend.id, template_id="short-form", tone="casual",
+                                           custom_prompt=custom_prompt)
+        return asyncio.run(service.generate_content_script(trend, request, user_id))
+
+    prompted = generate("alice", "Focus on our startup's pricing")
+    plain = generate("alice", None)
+
+    assert generate("alice", "Focus on our startup's pricing").reusedFrom == prompted.id
+    assert generate("bob", "Focus on our startup's pricing").reusedFrom is None
+    assert generate("bob", None).reusedFrom == plain.id
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models import Trend, TrendRecord, TREND_SUMMARY_FIELDS, trend_field_include  # noqa: E402
+from tests.benchmarks.trend_records import snapshot_payload  # noqa: E402
+
+
+def test_records_serialize_like_models():
+    for data in snapshot_payload(8):
+        model = Trend(**data)
+        record = TrendRecord.from_dict(data)
+
+        assert record.to_dict() == model.dict()
+        include = trend_field_include(TREND_SUMMARY_FIELDS)
+        assert record.to_dict(include=include) == model.dict(include=include)
+        assert record.to_model() == model
+
+
+def test_records_share_interned_strings():
+    first, second = [TrendRecord.from_dict(data) for data in snapshot_payload(5)[::4]]
+
+    assert first.platform is second.platform
+    assert first.timeframe is second.timeframe
+
+
+def test_records_are_slotted():
+    record = TrendRecord.from_dict(snapshot_payload(1)[0])
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.unexpected = True
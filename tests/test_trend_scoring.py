@@ -0,0 +1,95 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+from models import EngagementMetrics, PlatformMetrics  # noqa: E402
+from services.trend_scoring import (  # noqa: E402
+    FEATURE_NAMES, SLOWEST_VELOCITY_LABEL, TrendScoringModel, engagement_features, timeframe_hours
+)
+
+
+def _engagement(scale: float) -> EngagementMetrics:
+    """Engagement of a typical trending topic, with every count scaled"""
+    return EngagementMetrics(
+        twitter=PlatformMetrics(mentions=int(45000 * scale), posts=int(12500 * scale), sentiment=0.8),
+        youtube=PlatformMetrics(videos=int(234 * scale), totalViews=int(890000 * scale), avgViews=int(3800 * scale)),
+        reddit=PlatformMetrics(posts=int(89 * scale), upvotes=int(15600 * scale), comments=int(2400 * scale)),
+        tiktok=PlatformMetrics(videos=int(156 * scale), totalViews=int(456000 * scale), engagement=0.12),
+    )
+
+
+def _features(scales, hours=None, previous=None):
+    engagements = [_engagement(scale) for scale in scales]
+    return engagement_features(engagements, hours or [6.0] * len(engagements), previous)
+
+
+def test_scores_stay_in_range():
+    scales = [0, 1e-6, 0.01, 1, 100, 1e9]
+    scores = TrendScoringModel().score(_features(scales), ["Technology"] * len(scales))
+
+    assert scores.dtype.kind == "i"
+    assert ((scores >= 0) & (scores <= 100)).all()
+
+
+def test_more_engagement_never_scores_lower():
+    scales = [0.01, 0.1, 0.5, 1, 2, 10]
+    scores = TrendScoringModel().score(_features(scales), ["Lifestyle"] * len(scales))
+
+    assert list(scores) == sorted(scores)
+    assert scores[0] < scores[-1]
+
+
+def test_recent_and_growing_trends_are_faster():
+    model = TrendScoringModel()
+    fresh, old = model.velocity_labels(_features([1, 1], hours=[1.0, 72.0]))
+    assert fresh != old
+
+    grown = _features([1], previous=[_engagement(0.2)])
+    flat = _features([1], previous=[_engagement(1)])
+    assert model.score(grown, ["Business"])[0] > model.score(flat, ["Business"])[0]
+
+
+@pytest.mark.parametrize("signal, label", [
+    (1.5, "Exploding"),
+    (1.0, "Rising Fast"),
+    (0.01, "Rising Fast"),
+    (0.0, "Steady Growth"),
+    (-1.5, SLOWEST_VELOCITY_LABEL),
+    (-3.0, SLOWEST_VELOCITY_LABEL),
+])
+def test_velocity_label_thresholds(signal, label):
+    features = np.zeros((1, len(FEATURE_NAMES)))
+    # The label follows velocity + growth; thresholds are exclusive
+    features[0, FEATURE_NAMES.index("velocity")] = signal / 2
+    features[0, FEATURE_NAMES.index("growth")] = signal / 2
+
+    assert TrendScoringModel.velocity_labels(features) == [label]
+
+
+def test_fit_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(7)
+    scales = rng.lognormal(0, 1, 200)
+    features = _features(list(scales))
+    categories = [("Technology", "Business", "Food")[i % 3] for i in range(len(scales))]
+    targets = TrendScoringModel().score(features, categories)
+
+    fitted = TrendScoringModel.fit(features, categories, targets)
+    assert np.abs(fitted.score(features, categories) - targets).mean() < 3
+
+    path = tmp_path / "weights.json"
+    fitted.save(path)
+    loaded = TrendScoringModel.load(path)
+
+    assert loaded.to_dict() == fitted.to_dict()
+    assert (loaded.score(features, categories) == fitted.score(features, categories)).all()
+
+
+def test_unknown_weights_are_rejected():
+    with pytest.raises(ValueError):
+        TrendScoringModel(weights={"twitter.likes": 1.0})
+
+
+@pytest.mark.parametrize("timeframe, hours", [("3h ago", 3.0), ("2 days ago", 48.0), ("1 hour ago", 1.0), ("just now", 6.0)])
+def test_timeframe_hours(timeframe, hours):
+    assert timeframe_hours(timeframe) == hours
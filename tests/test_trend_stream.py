@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models import TrendRecord  # noqa: E402
+from services.trend_stream import TrendChangeFeed  # noqa: E402
+from tests.benchmarks.trend_records import snapshot_payload  # noqa: E402
+
+
+def _rebuild(payload, **changes):
+    """Records as a snapshot rebuild produces them: same content, fresh timestamps"""
+    rebuilt_at = datetime.utcnow() + timedelta(minutes=5)
+    return [
+        TrendRecord.from_dict({**data, **changes.get(data["id"], {}), "created_at": rebuilt_at, "updated_at": rebuilt_at})
+        for data in payload
+    ]
+
+
+def test_rebuilt_timestamps_are_not_updates():
+    payload = snapshot_payload(3)
+    feed = TrendChangeFeed()
+    feed.publish(1, [TrendRecord.from_dict(data) for data in payload])
+
+    feed.publish(2, _rebuild(payload, **{payload[0]["id"]: {"contentScore": 12}}))
+
+    (_, encoded), = feed.deltas_since(1)
+    updated = json.loads(encoded)["updated"]
+    assert [entry["id"] for entry in updated] == [payload[0]["id"]]
+    assert updated[0]["contentScore"] == 12